@@ -0,0 +1,93 @@
+"""
+Micro-benchmark of the keyword count and currency detection over synthetic headlines
+Compares the TextAnalyzer against the split based code it replaced, keeping the best of a few runs of each
+
+Usage: python benchmarks/analyzer_benchmark.py [number of headlines] [runs]
+"""
+import os, random, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from libraries.analyzer import TextAnalyzer
+
+WORDS = ["city", "council", "mayor", "budget", "Queen", "queen", "report", "market", "housing", "subway",
+         "school", "election", "court", "plan", "tax", "police", "park", "museum", "storm", "vote"]
+MONEY = ["$11.1", "$111,111.11", "11 dollars", "11 USD", "$5", "dollar", "USD", "$"]
+
+def legacy_analyze(article_title: str, article_description: str, search_phrase: str):
+    """
+    The analysis done inline in get_articles_information before the TextAnalyzer, without the prints
+    """
+    keyword_count = len(article_title.split(search_phrase)) - 1
+    keyword_count = keyword_count + len(article_description.split(search_phrase)) -1
+
+    has_money = False
+    for text in (article_title, article_description):
+        if not ("$" in text or "dollar" in text or "USD" in text):
+            continue
+        sign_in_text = text.split("$")
+        dollar_in_text = text.split("dollar")
+        usd_in_text = text.split("USD")
+        if len(sign_in_text) > 1 and has_money == False:
+            try:
+                float(sign_in_text[1].split(" ")[0].replace(",", ""))
+                has_money = True
+            except:
+                pass
+        if len(dollar_in_text) > 1 and has_money == False:
+            try:
+                float(dollar_in_text[0].split(" ")[-1].replace(",", ""))
+                has_money = True
+            except:
+                pass
+        if len(usd_in_text) > 1 and has_money == False:
+            try:
+                float(usd_in_text[0].split(" ")[-1].replace(",", ""))
+                has_money = True
+            except:
+                pass
+        break
+    return keyword_count, has_money
+
+def synthetic_articles(size: int, seed: int = 7):
+    """
+    Builds random headlines and descriptions, about a third of them mentioning money
+    """
+    generator = random.Random(seed)
+    def sentence(length):
+        words = [generator.choice(WORDS) for _ in range(length)]
+        if generator.random() < 0.3:
+            words.insert(generator.randrange(len(words)), generator.choice(MONEY))
+        return " ".join(words)
+    return [{"title": sentence(10), "description": sentence(30)} for _ in range(size)]
+
+def best_time(function, runs: int):
+    """
+    Returns the shortest of several runs of the function, the others are mostly noise of the machine
+    """
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    articles = synthetic_articles(size)
+    search_phrase = "Queen"
+
+    legacy_time = best_time(lambda: [legacy_analyze(article["title"], article["description"], search_phrase)
+                                     for article in articles], runs)
+    analyzer = TextAnalyzer([search_phrase], case_sensitive=True)
+    analyzer_time = best_time(lambda: analyzer.analyze_batch(articles), runs)
+    insensitive_analyzer = TextAnalyzer([search_phrase], case_sensitive=False)
+    insensitive_time = best_time(lambda: insensitive_analyzer.analyze_batch(articles), runs)
+
+    print("{} articles, best of {} runs".format(size, runs))
+    print("Legacy split analysis:          {:.3f}s ({:,.0f} articles/s)".format(legacy_time, size / legacy_time))
+    print("TextAnalyzer:                   {:.3f}s ({:,.0f} articles/s)".format(analyzer_time, size / analyzer_time))
+    print("TextAnalyzer, ignoring case:    {:.3f}s ({:,.0f} articles/s)".format(insensitive_time, size / insensitive_time))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Import time benchmark of the robot's modules, measured with python -X importtime in a fresh interpreter per module
+Prints the cumulative import time of each module and the slowest imports it pulls in, and saves the results as JSON
+
+Usage: python benchmarks/import_benchmark.py [--modules task libraries.common ...] [--repeat 5] [--top 10]
+                                             [--output results.json]
+"""
+import argparse, json, os, platform, statistics, subprocess, sys
+from datetime import datetime
+
+ROOT_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["config", "libraries.common", "task", "libraries.process", "libraries.nytimes.nytimes"]
+
+def parse_importtime(output: str):
+    """
+    Function that parses the stderr of python -X importtime and returns {module: cumulative microseconds}
+    """
+    imports = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_time, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|", 2)]
+        imports[name] = int(cumulative)
+    return imports
+
+def measure(module: str):
+    """
+    Imports the module in a new interpreter and returns its imports, or the error if it couldn't be imported
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import {}".format(module)],
+                            cwd=ROOT_FOLDER, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    imports = parse_importtime(result.stderr)
+    error = "" if result.returncode == 0 else result.stderr.strip().splitlines()[-1]
+    return imports, error
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the import time of the robot's modules")
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports shown per module")
+    parser.add_argument("--output", default=None)
+    arguments = parser.parse_args()
+
+    results = {"started": datetime.now().isoformat(), "python": platform.python_version(),
+               "platform": platform.platform(), "repeat": arguments.repeat, "modules": []}
+    for module in arguments.modules:
+        runs = []
+        for _ in range(arguments.repeat):
+            imports, error = measure(module)
+            runs.append(imports)
+        #The median of each import across the runs, so a cold disk cache on the first run doesn't skew it
+        names = set().union(*runs)
+        medians = {name: statistics.median([run.get(name, 0) for run in runs]) for name in names}
+        total = medians.get(module, 0)
+        slowest = sorted(((name, value) for name, value in medians.items() if name != module and "." not in name),
+                         key=lambda item: -item[1])[:arguments.top]
+
+        results["modules"].append({"module": module, "total_ms": round(total / 1000, 2), "imported_modules": len(names),
+                                   "error": error, "slowest": [{"module": name, "ms": round(value / 1000, 2)} for name, value in slowest]})
+        print("{:<30} {:>9.1f} ms {:>5} modules{}".format(module, total / 1000, len(names), "  ({})".format(error) if error else ""))
+        for name, value in slowest:
+            print("    {:<26} {:>9.1f} ms".format(name, value / 1000))
+
+    output = arguments.output or os.path.join(ROOT_FOLDER, "benchmarks", "results", "imports_{}.json".format(
+        datetime.now().strftime("%Y%m%d_%H%M%S")))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print("Saved the results in {}".format(output))
+
+if __name__ == "__main__":
+    main()
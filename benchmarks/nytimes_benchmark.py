@@ -0,0 +1,82 @@
+"""
+End to end benchmark of the robot against the local NY Times replica, without hitting the live site
+Times every stage of Nytimes for each number of articles and saves the results as JSON to compare runs
+
+Usage: python benchmarks/nytimes_benchmark.py [--articles 10 500 5000] [--images N] [--backend browser|http]
+                                             [--profile full|lean] [--output results.json]
+"""
+import argparse, json, os, platform, shutil, sys, tempfile, time
+from datetime import datetime
+
+ROOT_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_FOLDER)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from nytimes_replica import start_replica
+
+STAGES = ["access_nytimes", "initial_search", "filter_page", "find_dates", "get_articles_information", "create_excel"]
+QUERY = {"search_phrase": "Queen", "news_section": "New York", "month_number": "2"}
+
+def run_once(backend: str, article_count: int, image_count: int, profile: str = "full"):
+    """
+    Runs every stage against a replica with the given number of articles and returns their timings
+    """
+    server, url = start_replica(article_count, image_count)
+    output_folder = tempfile.mkdtemp(prefix="nytimes_benchmark_")
+    browser = None
+    try:
+        if backend == "http":
+            from libraries.nytimes.nytimes_http import NytimesHttp
+            nytimes = NytimesHttp({"url": url, "search_url": url + "svc/search/v2/articlesearch.json"}, QUERY, output_folder)
+        else:
+            from libraries.common import get_browser
+            from libraries.nytimes.nytimes import Nytimes
+            from libraries.browser_profile import get_browser_preferences, get_blocked_url_patterns, block_urls
+            browser = get_browser()
+            browser.open_available_browser(preferences = get_browser_preferences(output_folder, profile == "lean"), headless = True)
+            browser.set_window_size(1920, 1080)
+            if profile == "lean":
+                block_urls(browser.driver, get_blocked_url_patterns())
+            nytimes = Nytimes(browser, {"url": url}, QUERY, output_folder)
+
+        stages = {}
+        for stage in STAGES:
+            start = time.perf_counter()
+            getattr(nytimes, stage)()
+            stages[stage] = round(time.perf_counter() - start, 4)
+        nytimes.close()
+
+        return {"articles": article_count, "images": image_count, "articles_found": nytimes.articles_found,
+                "results_written": nytimes.results_count, "stages": stages, "total": round(sum(stages.values()), 4)}
+    finally:
+        if browser is not None:
+            browser.close_browser()
+        server.shutdown()
+        shutil.rmtree(output_folder, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the robot against a local NY Times replica")
+    parser.add_argument("--articles", type=int, nargs="+", default=[10, 500, 5000])
+    parser.add_argument("--images", type=int, default=None, help="Number of distinct images, defaults to one per article")
+    parser.add_argument("--backend", choices=["browser", "http"], default="browser")
+    parser.add_argument("--profile", choices=["full", "lean"], default="full")
+    parser.add_argument("--output", default=None)
+    arguments = parser.parse_args()
+
+    results = {"backend": arguments.backend, "profile": arguments.profile, "headless": True, "started": datetime.now().isoformat(),
+               "python": platform.python_version(), "platform": platform.platform(), "runs": []}
+    for article_count in arguments.articles:
+        image_count = article_count if arguments.images is None else arguments.images
+        run = run_once(arguments.backend, article_count, image_count, arguments.profile)
+        results["runs"].append(run)
+        print("{:>6} articles: {}".format(article_count, ", ".join(
+            "{} {:.2f}s".format(stage, seconds) for stage, seconds in run["stages"].items())))
+
+    output = arguments.output or os.path.join(ROOT_FOLDER, "benchmarks", "results", "nytimes_{}_{}.json".format(
+        arguments.backend, datetime.now().strftime("%Y%m%d_%H%M%S")))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print("Saved the results in {}".format(output))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Local replica of the NY Times homepage and search page, with the elements the robot uses:
+search button and input, Section filter, sort select, date picker, "Show more" button and result items
+
+It also serves the result images and an Article Search API style JSON endpoint for the HTTP backend,
+and images that fail under /fixtures/: missing/ answers 404, flaky/ answers 503 to the first request of each image
+and truncated/ closes the connection halfway through the image
+
+Usage: python benchmarks/nytimes_replica.py [number of articles] [number of images] [port]
+"""
+import json, struct, sys, threading, zlib
+from datetime import datetime, timedelta
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+PAGE_SIZE = 10
+SECTIONS = ["Any", "New York", "World", "U.S.", "Business", "Arts"]
+
+def create_png(size: int = 64):
+    """
+    Function that returns the bytes of a gray PNG image, used for every result image
+    """
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+    rows = b"".join(b"\x00" + bytes([128]) * size for _ in range(size))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 0, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b""))
+
+def create_articles(article_count: int, image_count: int, days: int = 25):
+    """
+    Function that returns the articles of the replica, newest first, spread over the given days
+    An extra article older than the spread comes last, so the search has a point to stop at
+    """
+    today = datetime.now()
+    articles = []
+    for position in range(article_count + 1):
+        if position < article_count:
+            published = today - timedelta(days=position * days // max(1, article_count))
+        else:
+            published = today - timedelta(days=days * 4)
+        money = " for ${},000".format(position) if position % 3 == 0 else ""
+        articles.append({
+            "title": "Queen visits the city council, report {}".format(position),
+            "date": "{} {}, {}".format(published.strftime("%B"), published.day, published.year),
+            "published": published,
+            "description": "The queen talked about the budget{} with the mayor in article {}.".format(money, position),
+            "image": "/images/{}.png".format(position % image_count) if image_count else "",
+            "link": "/{}/article-{}.html".format(published.strftime("%Y/%m/%d"), position)
+        })
+    return articles
+
+HOME_PAGE = """<!DOCTYPE html>
+<html><head><title>NY Times replica</title></head><body>
+<header>
+  <button data-test-id="search-button" onclick="document.getElementById('search-form').style.display='block'">Search</button>
+  <form id="search-form" action="/search" method="get" style="display:none">
+    <input data-testid="search-input" name="query" type="text">
+  </form>
+</header>
+</body></html>"""
+
+SEARCH_PAGE = """<!DOCTYPE html>
+<html><head><title>Search - NY Times replica</title></head><body>
+<div>
+  <button onclick="toggle('sections')"><span>Section</span></button>
+  <ul tabindex="-1" id="sections" style="display:none">{sections}</ul>
+  <button onclick="toggle('date-range')"><span>Date Range</span></button>
+  <div id="date-range" style="display:none">
+    <button value="Specific Dates" onclick="toggle('day-picker')">Specific Dates</button>
+    <div data-testid="search-day-picker" id="day-picker" style="display:none">
+      <input data-testid="DateRange-startDate" type="text">
+      <input data-testid="DateRange-endDate" type="text">
+      {days}
+    </div>
+  </div>
+  <select data-testid="SearchForm-sortBy"><option value="best">Relevance</option><option value="newest">Newest</option></select>
+</div>
+<ol data-testid="search-results">{results}</ol>
+{show_more}
+<script>
+var loaded = {loaded};
+function toggle(id) {{
+  var element = document.getElementById(id);
+  element.style.display = element.style.display === "none" ? "block" : "none";
+}}
+function showMore(button) {{
+  fetch("/api/results?offset=" + loaded).then(function (response) {{ return response.json(); }}).then(function (page) {{
+    var list = document.querySelector('ol[data-testid="search-results"]');
+    list.insertAdjacentHTML("beforeend", page.html);
+    loaded += page.count;
+    if (!page.more) {{ button.remove(); }}
+  }});
+}}
+</script>
+</body></html>"""
+
+SHOW_MORE_BUTTON = '<button data-testid="search-show-more-button" onclick="showMore(this)">Show More</button>'
+
+def render_article(article: dict):
+    image = '<img src="{}" alt="">'.format(article["image"]) if article["image"] else ""
+    return ('<li data-testid="search-bodega-result"><div><span data-testid="todays-date">{date}</span>'
+            '<div><a href="{link}"><h4>{title}</h4><p>{description}</p></a></div>{image}</div></li>').format(
+        date=escape(article["date"]), link=article["link"], title=escape(article["title"]),
+        description=escape(article["description"]), image=image)
+
+class ReplicaHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def send(self, body: bytes, content_type: str, status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        articles = self.server.articles
+
+        if url.path == "/":
+            self.send(HOME_PAGE.encode(), "text/html; charset=utf-8")
+        elif url.path == "/search":
+            page = articles[:PAGE_SIZE]
+            body = SEARCH_PAGE.format(
+                sections="".join('<li><label><input type="checkbox" value="{0}"><span>{0}</span></label></li>'.format(escape(section))
+                                 for section in SECTIONS),
+                days="".join('<div>{}</div>'.format(day) for day in range(1, 32)),
+                results="".join(render_article(article) for article in page),
+                show_more=SHOW_MORE_BUTTON if len(articles) > PAGE_SIZE else "",
+                loaded=len(page))
+            self.send(body.encode(), "text/html; charset=utf-8")
+        elif url.path == "/api/results":
+            offset = int(params.get("offset", ["0"])[0])
+            page = articles[offset:offset + PAGE_SIZE]
+            body = {"html": "".join(render_article(article) for article in page), "count": len(page),
+                    "more": offset + PAGE_SIZE < len(articles)}
+            self.send(json.dumps(body).encode(), "application/json")
+        elif url.path == "/svc/search/v2/articlesearch.json":
+            page_number = int(params.get("page", ["0"])[0])
+            page = articles[page_number * PAGE_SIZE:(page_number + 1) * PAGE_SIZE]
+            docs = [{"headline": {"main": article["title"]}, "abstract": article["description"],
+                     "pub_date": article["published"].strftime("%Y-%m-%dT%H:%M:%S+0000"),
+                     "web_url": "http://{}:{}{}".format(*self.server.server_address[:2], article["link"]),
+                     "multimedia": [{"url": "http://{}:{}{}".format(*self.server.server_address[:2], article["image"])}] if article["image"] else []}
+                    for article in page]
+            self.send(json.dumps({"status": "OK", "response": {"docs": docs}}).encode(), "application/json")
+        elif url.path.startswith("/images/"):
+            self.send(self.server.image, "image/png")
+        elif url.path.startswith("/fixtures/"):
+            self.send_fixture(url.path)
+        else:
+            self.send(b"Not found", "text/plain", 404)
+
+    def send_fixture(self, path: str):
+        kind = path.split("/")[2]
+        if kind == "flaky":
+            with self.server.lock:
+                self.server.requests[path] = self.server.requests.get(path, 0) + 1
+                first_request = self.server.requests[path] == 1
+            if first_request:
+                return self.send(b"Try again", "text/plain", 503)
+            return self.send(self.server.image, "image/png")
+        if kind == "truncated":
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(self.server.image)))
+            self.end_headers()
+            self.wfile.write(self.server.image[:len(self.server.image) // 2])
+            self.close_connection = True
+            return
+        self.send(b"Not found", "text/plain", 404)
+
+def start_replica(article_count: int, image_count: int = None, port: int = 0):
+    """
+    Function that starts the replica in a background thread and returns the server and its url
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), ReplicaHandler)
+    server.daemon_threads = True
+    server.articles = create_articles(article_count, article_count if image_count is None else image_count)
+    server.image = create_png()
+    server.requests = {}
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, "http://127.0.0.1:{}/".format(server.server_address[1])
+
+if __name__ == "__main__":
+    article_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    image_count = int(sys.argv[2]) if len(sys.argv) > 2 else article_count
+    server, url = start_replica(article_count, image_count, int(sys.argv[3]) if len(sys.argv) > 3 else 8000)
+    print("Serving {} articles at {}".format(article_count, url))
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
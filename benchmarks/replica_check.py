@@ -0,0 +1,129 @@
+"""
+Checks the image downloader and the HTTP search backend against the local NY Times replica, without hitting the live site
+Every check runs against a fresh output folder, and the script exits with 1 if any of them fails
+
+Usage: python benchmarks/replica_check.py
+"""
+import csv, hashlib, os, shutil, sys, tempfile
+
+#Set before the config is imported, the checks read the results as CSV and don't resume anything
+os.environ.setdefault("Output Format", "csv")
+os.environ.setdefault("Checkpoint", "False")
+os.environ.setdefault("Incremental", "False")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from nytimes_replica import start_replica, PAGE_SIZE
+
+QUERY = {"search_phrase": "Queen", "news_section": "Any", "month_number": "2"}
+
+def check_downloads(server, url: str, output_folder: str):
+    """
+    The images are downloaded concurrently with their original bytes, under the given names
+    """
+    from libraries.downloader import ImageDownloader
+    downloader = ImageDownloader(output_folder, workers = 4, per_host = 2)
+    try:
+        futures = {"{}.png".format(position): downloader.submit("{}images/{}.png".format(url, position), "{}.png".format(position))
+                   for position in range(20)}
+        results = {image_name: future.result() for image_name, future in futures.items()}
+    finally:
+        downloader.close()
+    expected_hash = hashlib.sha256(server.image).hexdigest()
+    for image_name, (image_hash, error) in results.items():
+        assert error is None, "{} failed: {}".format(image_name, error)
+        assert image_hash == expected_hash, "{} has the hash {}".format(image_name, image_hash)
+        with open(os.path.join(output_folder, image_name), "rb") as file:
+            assert file.read() == server.image, "{} isn't the original image".format(image_name)
+
+def check_retries(server, url: str, output_folder: str):
+    """
+    An image that fails with a 503 the first time is downloaded on the retry
+    """
+    from libraries.downloader import ImageDownloader
+    downloader = ImageDownloader(output_folder, retries = 2)
+    try:
+        image_hash = downloader.download(url + "fixtures/flaky/retried.png")
+    finally:
+        downloader.close()
+    assert image_hash == hashlib.sha256(server.image).hexdigest(), "The retried image has the hash {}".format(image_hash)
+    assert os.path.exists(os.path.join(output_folder, "retried.png")), "The retried image wasn't written"
+
+def check_failures(server, url: str, output_folder: str):
+    """
+    A missing image, and one cut halfway through, fail without leaving a file or a partial file behind
+    """
+    from libraries.downloader import ImageDownloader
+    downloader = ImageDownloader(output_folder, retries = 0)
+    try:
+        for image_url in (url + "fixtures/missing/missing.png", url + "fixtures/truncated/truncated.png"):
+            image_hash, error = downloader.submit(image_url).result()
+            assert error is not None and not image_hash, "{} didn't fail".format(image_url)
+    finally:
+        downloader.close()
+    assert not os.listdir(output_folder), "The failed downloads left {}".format(os.listdir(output_folder))
+
+def run_http_search(url: str, search_url: str, output_folder: str):
+    """
+    Runs every stage of the HTTP backend and returns the source and the rows of its results file
+    """
+    from libraries.nytimes.nytimes_http import NytimesHttp
+    credentials = {"url": url}
+    if search_url:
+        credentials["search_url"] = search_url
+    nytimes = NytimesHttp(credentials, QUERY, output_folder)
+    try:
+        nytimes.access_nytimes()
+        nytimes.initial_search()
+        nytimes.filter_page()
+        nytimes.find_dates()
+        nytimes.get_articles_information()
+        nytimes.create_excel()
+    finally:
+        nytimes.close()
+    with open(nytimes.results_path, encoding="utf-8") as file:
+        return nytimes, list(csv.DictReader(file))
+
+def check_api_search(server, url: str, output_folder: str):
+    """
+    The Article Search API endpoint is paged until the articles get older than the search date
+    """
+    nytimes, rows = run_http_search(url, None, output_folder)
+    assert nytimes.search_url == url + "svc/search/v2/articlesearch.json", "Searched {}".format(nytimes.search_url)
+    expected = [article["title"] for article in server.articles if article["published"] >= nytimes.get_search_date()]
+    titles = [row["Title"] for row in rows]
+    assert sorted(titles) == sorted(expected), "Got {} results instead of {}".format(len(titles), len(expected))
+    for row in rows:
+        assert os.path.exists(os.path.join(output_folder, row["Image Name"])), "{} has no image".format(row["Title"])
+
+def check_html_search(server, url: str, output_folder: str):
+    """
+    A search page that answers the same results for every page stops after the first one, without duplicates
+    """
+    nytimes, rows = run_http_search(url, url + "search", output_folder)
+    titles = [row["Title"] for row in rows]
+    assert len(titles) == PAGE_SIZE, "Got {} results instead of {}".format(len(titles), PAGE_SIZE)
+    assert len(set(titles)) == len(titles), "The results have duplicates"
+
+CHECKS = [check_downloads, check_retries, check_failures, check_api_search, check_html_search]
+
+def main():
+    server, url = start_replica(30, 10)
+    failed = 0
+    try:
+        for check in CHECKS:
+            output_folder = tempfile.mkdtemp(prefix="replica_check_")
+            try:
+                check(server, url, output_folder)
+                print("ok      {}".format(check.__name__))
+            except Exception as e:
+                failed += 1
+                print("FAILED  {}: {}".format(check.__name__, e))
+            finally:
+                shutil.rmtree(output_folder, ignore_errors = True)
+    finally:
+        server.shutdown()
+    print("{} of {} checks passed".format(len(CHECKS) - failed, len(CHECKS)))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,83 @@
-import os
+import json, os
 
 OUTPUT_FOLDER = os.path.join(os.environ.get("ROBOT_ROOT", os.getcwd()), 'output')
-tabs_dict = {}
 search_phrase = os.environ.get("Search Phrase", "Queen")
 news_section = os.environ.get("Category or Section", "New York")
-month_number = os.environ.get("Number of Months", "1")
\ No newline at end of file
+month_number = os.environ.get("Number of Months", "1")
+image_download_workers = int(os.environ.get("Image Download Workers", "8"))
+image_download_per_host = int(os.environ.get("Image Download Per Host", "4"))
+image_download_timeout = float(os.environ.get("Image Download Timeout", "15"))
+image_download_retries = int(os.environ.get("Image Download Retries", "3"))
+
+#0 means no limit on the number of "Show more" pages or articles loaded per search
+max_result_pages = int(os.environ.get("Max Result Pages", "0"))
+max_results = int(os.environ.get("Max Results", "0"))
+
+#"browser" drives Chrome through Selenium, "http" requests the search endpoint directly
+search_backend = os.environ.get("Search Backend", "browser")
+nytimes_search_url = os.environ.get("Search URL", "https://api.nytimes.com/svc/search/v2/articlesearch.json")
+nytimes_api_key = os.environ.get("NYT API Key", "")
+search_http_timeout = float(os.environ.get("Search HTTP Timeout", "15"))
+
+#Comma separated keywords counted in each article, defaults to the search phrase
+search_keywords = [keyword.strip() for keyword in os.environ.get("Search Keywords", search_phrase).split(",") if keyword.strip()]
+#Keywords are counted case sensitive by default, as the "Keyword count" column always was
+keyword_case_sensitive = os.environ.get("Keyword Case Sensitive", "True").lower() == "true"
+
+#Format of the results file: xlsx, csv, jsonl or parquet
+output_format = os.environ.get("Output Format", "xlsx")
+
+#Incremental runs keep the output folder and only process the articles that aren't in the article index yet
+incremental = os.environ.get("Incremental", "False").lower() == "true"
+article_index_path = os.environ.get("Article Index", os.path.join(os.environ.get("ROBOT_ROOT", os.getcwd()), "article_index.sqlite"))
+
+#Batch mode: a JSON list of queries, or the path of a JSON file with it, for example
+#[{"search_phrase": "Queen", "news_section": "New York", "month_number": "1"}]
+search_queries = os.environ.get("Search Queries", "")
+batch_workers = int(os.environ.get("Batch Workers", "2"))
+
+#Splits the search in date ranges of this many days, scraped in parallel. 0 searches the whole range at once
+date_shard_days = int(os.environ.get("Date Shard Days", "0"))
+date_shard_workers = int(os.environ.get("Date Shard Workers", "4"))
+
+#Records the time of every stage and Selenium call, and saves a trace in the output folder
+tracing = os.environ.get("Tracing", "False").lower() == "true"
+
+#Waits poll starting at Wait Initial Poll seconds and doubling up to Wait Max Poll
+#Wait Timeouts is a JSON object of {locator: seconds} that overrides Wait Timeout for those locators
+wait_timeout = float(os.environ.get("Wait Timeout", "10"))
+wait_optional_timeout = float(os.environ.get("Wait Optional Timeout", "2"))
+wait_initial_poll = float(os.environ.get("Wait Initial Poll", "0.01"))
+wait_max_poll = float(os.environ.get("Wait Max Poll", "0.5"))
+wait_timeouts = json.loads(os.environ.get("Wait Timeouts", "{}"))
+
+#"lean" runs the browser headless, without images, and blocks the URLs of the Blocked URLs patterns (* is a wildcard)
+#Allowed URLs are never blocked: a blocked pattern that matches one of them is left out
+browser_profile = os.environ.get("Browser Profile", "full").lower()
+blocked_urls = [url.strip() for url in os.environ.get("Blocked URLs", ",".join([
+    "*doubleclick.net*", "*googlesyndication.com*", "*googletagmanager.com*", "*google-analytics.com*",
+    "*amazon-adsystem.com*", "*facebook.net*", "*chartbeat.com*", "*scorecardresearch.com*", "*brandmetrics.com*",
+    "*adsrvr.org*", "*criteo.com*", "*.woff", "*.woff2", "*.ttf", "*.mp4", "*.webm", "*.m3u8", "*.gif"])).split(",") if url.strip()]
+allowed_urls = [url.strip() for url in os.environ.get("Allowed URLs", "").split(",") if url.strip()]
+
+#Number of articles each stage of the pipeline (analysis, image download, writing) can have waiting
+pipeline_queue_size = int(os.environ.get("Pipeline Queue Size", "100"))
+
+#Saves the progress of the run in the output folder, so it can be resumed with "python task.py --resume"
+checkpoint = os.environ.get("Checkpoint", "True").lower() == "true"
+checkpoint_interval = int(os.environ.get("Checkpoint Interval", "50"))
+
+#Service mode ("python task.py --serve"): warm browsers kept open, local API port and seconds a result is reused
+service_browsers = int(os.environ.get("Service Browsers", "2"))
+service_host = os.environ.get("Service Host", "127.0.0.1")
+service_port = int(os.environ.get("Service Port", "8765"))
+service_cache_ttl = float(os.environ.get("Service Cache TTL", "600"))
+service_job_history = int(os.environ.get("Service Job History", "1000"))
+
+#"async" writes the log from a background thread to the console and to a JSON lines file, "robot" uses the Robot Framework logger
+#Messages below Log Level (TRACE, DEBUG, INFO, WARN or ERROR) are dropped before they are formatted
+log_backend = os.environ.get("Log Backend", "async").lower()
+log_level = os.environ.get("Log Level", "INFO").upper()
+log_file = os.environ.get("Log File", os.path.join(OUTPUT_FOLDER, "log.jsonl"))
+log_flush_interval = float(os.environ.get("Log Flush Interval", "0.5"))
+log_batch_size = int(os.environ.get("Log Batch Size", "500"))
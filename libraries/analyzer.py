@@ -0,0 +1,50 @@
+import re
+
+#Amounts of money the way they show up in the news: $11.1, $111,111.11, 11 dollars, 11 USD
+#A "$" counts when a number follows it, and a unit when a number comes right before it
+#Each pattern starts with its currency marker, so the regex engine looks for it with the same fast search as str.find
+MONEY_PATTERNS = (("$", re.compile(r"\$ ?[0-9]")),
+                  ("dollar", re.compile(r"dollar(?:(?<=[0-9]dollar)|(?<=[0-9] dollar))s?\b")),
+                  ("usd", re.compile(r"usd(?:(?<=[0-9]usd)|(?<=[0-9] usd))\b")))
+
+class TextAnalyzer():
+    """
+    Counts the keywords and detects amounts of money in the texts of an article
+    The keywords are counted and the currency markers looked for with str.count and in, which use the CPython fast search,
+    since a single regex over the whole text steps through it a character at a time and measured slower than the split code
+    """
+
+    def __init__(self, keywords: list, case_sensitive: bool = False):
+        self.case_sensitive = case_sensitive
+        keywords = {keyword if case_sensitive else keyword.lower() for keyword in keywords if keyword}
+        self.keywords = tuple(keywords)
+
+    def analyze(self, *texts: str):
+        """
+        Returns the number of keywords found and whether there is money mentioned, given one or more texts
+        """
+        #All the texts are joined, so they are lowered and searched a single time
+        return self.analyze_text("\n".join(filter(None, texts)))
+
+    def analyze_text(self, text: str):
+        """
+        Returns the number of keywords found and whether there is money mentioned in a single text
+        """
+        lowered = text.lower()
+        searched = text if self.case_sensitive else lowered
+
+        keyword_count = 0
+        for keyword in self.keywords:
+            keyword_count += searched.count(keyword)
+
+        for marker, pattern in MONEY_PATTERNS:
+            if marker in lowered and pattern.search(lowered):
+                return keyword_count, True
+        return keyword_count, False
+
+    def analyze_batch(self, articles: list):
+        """
+        Returns the analysis of the title and description of every article, in the same order
+        """
+        analyze_text = self.analyze_text
+        return [analyze_text(article["title"] + "\n" + article["description"]) for article in articles]
@@ -0,0 +1,89 @@
+import json, sqlite3, threading
+from datetime import datetime
+
+class ArticleIndex():
+    """
+    SQLite index of the articles processed in previous runs, so the next runs only process the new ones
+    Each article is keyed by its query and its link, or its title and date when it has no link,
+    so an article found by several queries is stored once for each of them
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        #The pipeline reads and writes the index from its own threads, so every access goes through the lock
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS articles (
+                key TEXT NOT NULL,
+                query TEXT NOT NULL,
+                published TEXT NOT NULL,
+                article TEXT NOT NULL,
+                row TEXT NOT NULL,
+                analysis_key TEXT NOT NULL,
+                image_hash TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (query, key)
+            )""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS articles_query ON articles (query, published)")
+        #Oldest date down to which a query was completely scraped in its last run
+        self.connection.execute("CREATE TABLE IF NOT EXISTS queries (query TEXT PRIMARY KEY, covered_since TEXT NOT NULL)")
+        self.connection.commit()
+
+    @staticmethod
+    def article_key(article: dict):
+        """
+        Returns the key of an article record
+        """
+        return article.get("link") or "{}|{}".format(article["title"], article["date"])
+
+    def get(self, query: str, article: dict):
+        """
+        Returns the stored information of an article of a query, or None if the query doesn't have it in the index
+        """
+        with self.lock:
+            result = self.connection.execute("SELECT row, analysis_key, image_hash FROM articles WHERE query = ? AND key = ?",
+                                             (query, self.article_key(article))).fetchone()
+        if result is None:
+            return None
+        return {"row": json.loads(result[0]), "analysis_key": result[1], "image_hash": result[2]}
+
+    def save(self, query: str, published: datetime, article: dict, row: dict, analysis_key: str, image_hash: str = ""):
+        """
+        Stores, or updates, the information of an article
+        """
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                    (self.article_key(article), query, published.isoformat(), json.dumps(article),
+                                     json.dumps(row), analysis_key, image_hash or "", datetime.now().isoformat()))
+
+    def get_articles(self, query: str, since: datetime):
+        """
+        Returns the records of the articles of a query published after a date, newest first
+        """
+        with self.lock:
+            results = self.connection.execute("SELECT article FROM articles WHERE query = ? AND published > ? ORDER BY published DESC",
+                                              (query, since.isoformat())).fetchall()
+        return [json.loads(result[0]) for result in results]
+
+    def get_covered_since(self, query: str):
+        """
+        Returns the date down to which the query was completely scraped, or None
+        """
+        with self.lock:
+            result = self.connection.execute("SELECT covered_since FROM queries WHERE query = ?", (query,)).fetchone()
+        return datetime.fromisoformat(result[0]) if result else None
+
+    def set_covered_since(self, query: str, since: datetime):
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO queries VALUES (?, ?)", (query, since.isoformat()))
+            self.connection.commit()
+
+    def commit(self):
+        with self.lock:
+            self.connection.commit()
+
+    def close(self):
+        with self.lock:
+            self.connection.commit()
+            self.connection.close()
@@ -0,0 +1,107 @@
+import json, os, re
+from concurrent.futures import ProcessPoolExecutor
+from libraries.common import log_message, create_or_clean_dir, capture_page_screenshot
+from libraries.log_writer import log_writer
+from libraries.process import Process
+from libraries.sinks import read_results
+from config import OUTPUT_FOLDER, batch_workers, incremental
+
+SUMMARY_COLUMNS = ["Search Phrase", "Section", "Months", "Folder", "Results", "Error"]
+
+def load_queries(search_queries: str):
+    """
+    Function that returns the list of queries, given a JSON list or the path of a JSON file with it
+    """
+    if os.path.isfile(search_queries):
+        with open(search_queries, encoding="utf-8") as file:
+            queries = json.load(file)
+    else:
+        queries = json.loads(search_queries)
+
+    for query in queries:
+        if not query.get("search_phrase"):
+            raise ValueError("Every query needs a 'search_phrase': {}".format(query))
+        query.setdefault("news_section", "Any")
+        query["month_number"] = str(query.get("month_number", "1"))
+    return queries
+
+def get_query_folder_name(query: dict, position: int):
+    """
+    Function that returns the name of the output subfolder of a query
+    """
+    name = "{}_{}".format(query["search_phrase"], query["news_section"])
+    return "{:02d}_{}".format(position + 1, re.sub(r"[^\w-]+", "_", name).strip("_"))
+
+def run_query(query: dict, position: int, output_folder: str = OUTPUT_FOLDER, resume: bool = False):
+    """
+    Function that runs one query of the batch in its own headless browser and output subfolder
+    It runs inside a worker process, so it never raises and returns the summary of the query instead
+    """
+    folder_name = get_query_folder_name(query, position)
+    folder_path = os.path.join(output_folder, folder_name)
+    if incremental or resume:
+        os.makedirs(folder_path, exist_ok = True)
+    else:
+        create_or_clean_dir(folder_path)
+
+    summary = {"Search Phrase": query["search_phrase"], "Section": query["news_section"], "Months": query["month_number"],
+               "Folder": folder_name, "Results": 0, "Error": "", "Results File": ""}
+    process = None
+    try:
+        process = Process({}, query, folder_path, headless = True, resume = resume)
+        process.start()
+        summary["Results"] = process.nytimes.results_count
+        summary["Results File"] = process.nytimes.results_path
+    except Exception as e:
+        log_message("The query '{}' failed: {}".format(query["search_phrase"], str(e)), "ERROR")
+        summary["Error"] = str(e)
+        try:
+            capture_page_screenshot(folder_path)
+        except Exception:
+            pass
+    finally:
+        if process is not None:
+            process.finish()
+        #The worker process can exit without running atexit, so its log is written before returning
+        log_writer.close()
+    return summary
+
+def run_batch(queries: list, workers: int = batch_workers, output_folder: str = OUTPUT_FOLDER, resume: bool = False):
+    """
+    Function that runs every query in a pool of worker processes, each one with its own browser,
+    and merges their results in a summary workbook
+    """
+    log_message("Start - Batch of {} queries with {} workers".format(len(queries), workers))
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        summaries = list(executor.map(run_query, queries, range(len(queries)), [output_folder] * len(queries),
+                                      [resume] * len(queries)))
+
+    create_summary_workbook(summaries, os.path.join(output_folder, "Summary.xlsx"))
+    log_message("End - Batch of {} queries, {} failed".format(len(queries), len([s for s in summaries if s["Error"]])))
+    return summaries
+
+def create_summary_workbook(summaries: list, path: str):
+    """
+    Function that writes the status of every query, and all their results merged, in a single workbook
+    """
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+
+    queries_sheet = workbook.create_sheet("Queries")
+    queries_sheet.append(SUMMARY_COLUMNS)
+    for summary in summaries:
+        queries_sheet.append([summary[column] for column in SUMMARY_COLUMNS])
+
+    #The results are streamed from each query's file, so they are never all in memory at once
+    results_sheet = workbook.create_sheet("Results")
+    columns = None
+    for summary in summaries:
+        if not summary["Results File"]:
+            continue
+        for row in read_results(summary["Results File"]):
+            if columns is None:
+                columns = list(row)
+                results_sheet.append(["Search Phrase", "Section"] + columns)
+            results_sheet.append([summary["Search Phrase"], summary["Section"]] + [row.get(column) for column in columns])
+
+    workbook.save(path)
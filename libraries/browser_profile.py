@@ -0,0 +1,71 @@
+from fnmatch import fnmatchcase
+from libraries.common import log_message
+from config import browser_profile, blocked_urls, allowed_urls
+
+def get_browser_preferences(output_folder: str, lean: bool = False):
+    """
+    Function that returns the Chrome preferences of the robot, without images when the profile is lean
+    """
+    prefs = {
+        "profile.default_content_setting_values.notifications": 2,
+        "profile.default_content_setting_popups": 0,
+        "directory_upgrade": True,
+        "download.default_directory": output_folder,
+        "plugins.always_open_pdf_externally": True,
+        "download.prompt_for_download": False
+    }
+    if lean:
+        #The images are downloaded separately, the results page doesn't need to render them
+        prefs["profile.managed_default_content_settings.images"] = 2
+    return prefs
+
+def get_blocked_url_patterns(blocked: list = blocked_urls, allowed: list = allowed_urls):
+    """
+    Function that returns the blocked URL patterns, leaving out the ones that would block an allowed URL
+    """
+    return [pattern for pattern in blocked if not any(fnmatchcase(url, pattern) for url in allowed)]
+
+def execute_cdp_command(driver, command: str, params: dict):
+    """
+    Function that sends a Chrome DevTools Protocol command to the browser
+    Selenium versions without execute_cdp_cmd get the chromedriver endpoint registered by hand
+    """
+    if hasattr(driver, "execute_cdp_cmd"):
+        return driver.execute_cdp_cmd(command, params)
+    if "executeCdpCommand" not in driver.command_executor._commands:
+        driver.command_executor._commands["executeCdpCommand"] = ("POST", "/session/$sessionId/goog/cdp/execute")
+    return driver.execute("executeCdpCommand", {"cmd": command, "params": params})["value"]
+
+def block_urls(driver, patterns: list):
+    """
+    Function that makes the browser fail every request to a URL that matches one of the patterns
+    """
+    if not patterns:
+        return
+    execute_cdp_command(driver, "Network.enable", {})
+    execute_cdp_command(driver, "Network.setBlockedURLs", {"urls": patterns})
+
+def open_browser(browser, output_folder: str, headless: bool = False):
+    """
+    Function that opens the browser of an RPA Selenium instance with the profile of the robot
+    The lean profile always runs headless, without images, and blocks ads, trackers, fonts and media
+    """
+    lean = is_lean_profile()
+    headless = headless or lean
+
+    browser.open_available_browser(preferences = get_browser_preferences(output_folder, lean), headless = headless)
+    browser.set_window_size(1920, 1080)
+    if not headless:
+        browser.maximize_browser_window()
+    if lean:
+        try:
+            block_urls(browser.driver, get_blocked_url_patterns())
+        except Exception as e:
+            #Blocking is only an optimization, other browsers just load everything
+            log_message("Couldn't block the URLs of the lean profile: {}".format(str(e)))
+
+def is_lean_profile():
+    """
+    Function that returns whether the browser runs with the lean profile
+    """
+    return browser_profile == "lean"
@@ -0,0 +1,143 @@
+import json, os, threading
+from datetime import datetime
+from config import checkpoint_interval
+
+class Checkpoint():
+    """
+    Keeps the progress of a run in the output folder, so a run that failed midway can be resumed with --resume
+    checkpoint.json holds the query, the search date and the phase of the run, and is replaced atomically,
+    while two append-only JSON lines files hold the articles found and the rows written, in order
+    The search adds the articles and the pipeline writer adds the rows, so every change goes through the lock
+    """
+
+    def __init__(self, folder_path: str, interval: int = checkpoint_interval):
+        self.path = os.path.join(folder_path, "checkpoint.json")
+        self.articles_path = os.path.join(folder_path, "checkpoint_articles.jsonl")
+        self.rows_path = os.path.join(folder_path, "checkpoint_rows.jsonl")
+        self.interval = max(1, interval)
+        self.state = None
+        self.articles_file = None
+        self.rows_file = None
+        self.lock = threading.RLock()
+
+    def load(self):
+        """
+        Returns the state of the last checkpoint, or None if there is none
+        """
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def start(self, query: dict, search_date: datetime):
+        """
+        Starts a new checkpoint, discarding the previous one
+        """
+        with self.lock:
+            self.state = {"query": query, "search_date": search_date.isoformat(), "phase": "searching", "articles": 0, "rows": 0}
+            self.articles_file = open(self.articles_path, "w", encoding="utf-8")
+            self.rows_file = open(self.rows_path, "w", encoding="utf-8")
+            self.save()
+
+    def resume(self, state: dict):
+        """
+        Continues the given checkpoint. Unless the search had finished, it is done again,
+        so the articles found are discarded while the rows written are kept
+        """
+        with self.lock:
+            self.state = state
+            self.state["rows"] = sum(1 for _ in self.read_rows())
+            if state["phase"] == "searching":
+                self.state["articles"] = 0
+                self.articles_file = open(self.articles_path, "w", encoding="utf-8")
+            #A row cut in half by the crash is dropped, so the new rows start on a clean line
+            self.rewrite_rows()
+            self.rows_file = open(self.rows_path, "a", encoding="utf-8")
+            self.save()
+
+    def rewrite_rows(self):
+        rows = list(self.read_rows())
+        with open(self.rows_path + ".tmp", "w", encoding="utf-8") as file:
+            for key, row in rows:
+                file.write(json.dumps({"key": key, "row": row}, ensure_ascii=False) + "\n")
+        os.replace(self.rows_path + ".tmp", self.rows_path)
+
+    def add_article(self, article: dict):
+        line = json.dumps(article, ensure_ascii=False) + "\n"
+        with self.lock:
+            self.articles_file.write(line)
+            self.state["articles"] += 1
+            if self.state["articles"] % self.interval == 0:
+                self.save()
+
+    def add_row(self, key: str, row: dict):
+        line = json.dumps({"key": key, "row": row}, ensure_ascii=False) + "\n"
+        with self.lock:
+            self.rows_file.write(line)
+            self.state["rows"] += 1
+            if self.state["rows"] % self.interval == 0:
+                self.save()
+
+    def set_phase(self, phase: str):
+        with self.lock:
+            self.state["phase"] = phase
+            self.save()
+
+    def save(self):
+        """
+        Flushes the articles and rows to disk, and then replaces the state file
+        """
+        with self.lock:
+            for file in (self.articles_file, self.rows_file):
+                if file is not None:
+                    file.flush()
+                    os.fsync(file.fileno())
+            self.state["updated_at"] = datetime.now().isoformat()
+            with open(self.path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump(self.state, file)
+            os.replace(self.path + ".tmp", self.path)
+
+    def read_articles(self):
+        """
+        Yields the articles found, in order
+        """
+        return read_lines(self.articles_path)
+
+    def read_rows(self):
+        """
+        Yields the key of the article and the row of every row written, in order
+        """
+        for line in read_lines(self.rows_path):
+            yield line["key"], line["row"]
+
+    def close(self):
+        """
+        Saves the checkpoint, or removes its files once every row was written, since there is nothing left to resume
+        """
+        with self.lock:
+            finished = self.state is not None and self.state["phase"] == "written"
+            if self.state is not None and not finished:
+                self.save()
+            for file in (self.articles_file, self.rows_file):
+                if file is not None:
+                    file.close()
+            self.articles_file = None
+            self.rows_file = None
+            if finished:
+                for path in (self.path, self.articles_path, self.rows_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+def read_lines(path: str):
+    """
+    Function that yields the objects of a JSON lines file, stopping at a line cut in half by a crash
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                return
@@ -1,29 +1,99 @@
-import shutil, time, os
-from robot.api import logger
-from datetime import datetime, timedelta
-from RPA.Browser.Selenium import Selenium
-from RPA.Excel.Files import Files
-from RPA.FileSystem import FileSystem
-from config import OUTPUT_FOLDER
+import shutil, os
+from datetime import datetime
+from config import OUTPUT_FOLDER, wait_timeouts, log_backend
+from libraries.tracing import tracer
+from libraries.log_writer import log_writer
 
+#The RPA libraries are heavy to import, so they are only imported and created the first time they are used.
+#They are still reachable as common.browser, common.files, common.file_system and common.wait_engine
+_instances = {}
 
-browser = Selenium()
-files = Files()
-file_system = FileSystem()
+def create_browser():
+    """
+    Function that returns a new RPA Selenium instance, the browser itself is opened later
+    """
+    from RPA.Browser.Selenium import Selenium
+    browser = Selenium()
+    if tracer.enabled:
+        #Every Selenium call made through the browser is recorded, the wrapper isn't used at all when tracing is off
+        from libraries.tracing import InstrumentedBrowser
+        browser = InstrumentedBrowser(browser, tracer)
+    return browser
+
+def get_browser():
+    """
+    Function that returns the shared RPA Selenium instance, creating it on the first call
+    """
+    if "browser" not in _instances:
+        _instances["browser"] = create_browser()
+    return _instances["browser"]
+
+def get_wait_engine():
+    """
+    Function that returns the wait engine of the shared browser, creating it on the first call
+    """
+    if "wait_engine" not in _instances:
+        from libraries.waits import WaitEngine
+        _instances["wait_engine"] = WaitEngine(get_browser(), timeouts = wait_timeouts)
+    return _instances["wait_engine"]
+
+def get_files():
+    """
+    Function that returns the shared RPA Excel Files instance, creating it on the first call
+    """
+    if "files" not in _instances:
+        from RPA.Excel.Files import Files
+        _instances["files"] = Files()
+    return _instances["files"]
+
+def get_file_system():
+    """
+    Function that returns the shared RPA FileSystem instance, creating it on the first call
+    """
+    if "file_system" not in _instances:
+        from RPA.FileSystem import FileSystem
+        _instances["file_system"] = FileSystem()
+    return _instances["file_system"]
+
+def is_browser_created():
+    """
+    Function that returns whether the shared browser was created, without creating it
+    """
+    return "browser" in _instances
+
+_lazy_attributes = {"browser": get_browser, "wait_engine": get_wait_engine, "files": get_files, "file_system": get_file_system}
+
+def __getattr__(name: str):
+    #Only called for names that aren't defined in the module, so the old "from libraries.common import browser" still works
+    if name in _lazy_attributes:
+        return _lazy_attributes[name]()
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
 
-def log_message(message: str, level: str = "INFO", console: bool = True):
+def log_message(message: str, level: str = "INFO", console: bool = True, args: tuple = ()):
     """
     Function that logs messages depending on the level
+    Messages below the Log Level are dropped right away, and the args are only formatted into the message
+    once it is written, so a message that is filtered out costs almost nothing
     """
+    level = level.upper()
+    if not log_writer.is_enabled_for(level):
+        return
+    if log_backend != "robot":
+        log_writer.write(level, message, console, args)
+        return
+
+    from robot.api import logger
+    if args:
+        message = message.format(*args)
     log_switcher = {"TRACE": logger.trace, "INFO": logger.info, "WARN": logger.warn, "ERROR": logger.error}
 
-    if not level.upper() in log_switcher.keys() or level.upper() == "INFO":
+    if not level in log_switcher.keys() or level == "INFO":
         logger.info(message, True, console)
     else:
-        if level.upper() == "ERROR":
+        if level == "ERROR":
             logger.info(message, True, console)
         else:
-            log_switcher.get(level.upper(), logger.error)(message= True)
+            log_switcher[level](message)
 
 def print_version():
     """
@@ -32,9 +102,9 @@ def print_version():
     try:
         file = open("VERSION")
         try:
-            print("Version {}".format(file.read().strip()))
+            log_message("Version {}", args = (file.read().strip(),))
         except Exception as e:
-            print("Error reading VERSION file: {}".format(str(e)))
+            log_message("Error reading VERSION file: {}", "ERROR", args = (str(e),))
         finally:
             file.close()
     except Exception as e:
@@ -59,31 +129,25 @@ def capture_page_screenshot(folder_path: str, name: str = "None"):
     else:
         name = "{}_{}.png".format(name, datetime.now().strftime("%H_%M_%S"))
 
-    browser.capture_page_screenshot(os.path.join(folder_path, name))
+    get_browser().capture_page_screenshot(os.path.join(folder_path, name))
 
 def act_on_element(path: str, action: str, time_range: int = 5):
     """
-    Function that waits a predefined time for an element, and acts as soon as it finds it
-    """    
-    timer = datetime.now() + timedelta(0, time_range)
+    Function that waits up to a predefined time for an element, and acts as soon as it finds it
+    """
+    from selenium.common.exceptions import TimeoutException
+    wait_engine = get_wait_engine()
+    try:
+        if action == "click_element":
+            wait_engine.click(path, time_range)
+            return True
+        elif action == "find_elements":
+            return wait_engine.all_present(path, time_range)
+        elif action == "find_element":
+            return wait_engine.present(path, time_range)
+    except TimeoutException:
+        pass
 
-    while timer > datetime.now():
-        try:
-            if action == "click_element":
-                browser.click_element(path)
-                return True
-            elif action == "find_elements":
-                results = browser.find_elements(path)
-                if results:
-                    return results
-                else:
-                    raise Exception
-            elif action == "find_element":
-                result = browser.find_element(path)
-                return result
-        except Exception as e:
-            time.sleep(1)
-    
     raise Exception("Element {} not found".format(path))
 
 def convert_string_to_date(date_text: str):
@@ -103,3 +167,13 @@ def convert_string_to_date(date_text: str):
         new_date = "{}-{}-{}".format(year,month,day)
         new_formated_date = datetime.strptime(new_date,"%Y-%b-%d")
     return new_formated_date
+
+def get_article_date(date_text: str):
+    """
+    Function that receives the date shown in a search result and returns it as a datetime object
+    Relative dates, like "5m ago", are considered to be from today
+    """
+    date_list = date_text.split(" ")
+    if len(date_list) > 1 and date_list[1] == "ago":
+        return datetime.now()
+    return convert_string_to_date(date_text)
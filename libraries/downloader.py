@@ -0,0 +1,118 @@
+import hashlib, os, threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from libraries.tracing import tracer
+from config import OUTPUT_FOLDER, image_download_workers, image_download_per_host, image_download_timeout, image_download_retries
+
+def get_image_name(image_url: str):
+    """
+    Function that returns the file name used to store an image, given its url
+    """
+    return image_url.split("/")[-1].split("?")[0]
+
+def get_file_hash(file_path: str):
+    """
+    Function that returns the SHA-256 of a file, or an empty string if it doesn't exist
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(64 * 1024), b""):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return ""
+    return digest.hexdigest()
+
+class ImageDownloader():
+
+    def __init__(self, output_folder: str = OUTPUT_FOLDER, workers: int = image_download_workers,
+                 per_host: int = image_download_per_host, timeout: float = image_download_timeout,
+                 retries: int = image_download_retries):
+        self.output_folder = output_folder
+        self.workers = max(1, workers)
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        self.host_limits = {}
+        self.host_limits_lock = threading.Lock()
+        self.executor = None
+
+        #A single pooled session is shared by all the workers, so connections are reused between images
+        retry = Retry(total=retries, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(["GET"]))
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _host_limit(self, image_url: str):
+        """
+        Returns the semaphore that bounds the concurrent requests to the host of the url
+        """
+        host = urlparse(image_url).netloc
+        with self.host_limits_lock:
+            if host not in self.host_limits:
+                self.host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self.host_limits[host]
+
+    def download(self, image_url: str, image_name: str = ""):
+        """
+        Downloads the original bytes of an image into the output folder and returns their SHA-256
+        """
+        image_name = image_name or get_image_name(image_url)
+        image_path = os.path.join(self.output_folder, image_name)
+        digest = hashlib.sha256()
+
+        with self._host_limit(image_url), tracer.span("download_image", "http"):
+            response = self.session.get(image_url, timeout=self.timeout, stream=True)
+            #The retries urllib3 made before this answer
+            if response.raw.retries is not None:
+                tracer.count("download retries", len(response.raw.retries.history))
+            try:
+                response.raise_for_status()
+                #Writes to a temporary file first, so a failed download never leaves a truncated image behind
+                try:
+                    with open(image_path + ".part", "wb") as file:
+                        for chunk in response.iter_content(chunk_size=64 * 1024):
+                            file.write(chunk)
+                            digest.update(chunk)
+                            tracer.count("bytes downloaded", len(chunk))
+                except BaseException:
+                    #A download that failed midway doesn't leave its partial file in the output folder
+                    try:
+                        os.remove(image_path + ".part")
+                    except OSError:
+                        pass
+                    raise
+            finally:
+                response.close()
+
+        os.replace(image_path + ".part", image_path)
+        return digest.hexdigest()
+
+    def _fetch(self, image_url: str, image_name: str):
+        """
+        Downloads an image, returning its hash and the exception instead of raising it
+        """
+        try:
+            return self.download(image_url, image_name), None
+        except Exception as e:
+            return "", e
+
+    def submit(self, image_url: str, image_name: str = ""):
+        """
+        Queues an image to be downloaded in the background and returns its future
+        The result of the future is a tuple of the image hash and None when the download succeeded,
+        or of an empty string and the exception otherwise
+        """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        return self.executor.submit(self._fetch, image_url, image_name or get_image_name(image_url))
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        self.session.close()
@@ -0,0 +1,142 @@
+import atexit, json, multiprocessing, os, sys, threading, time
+from multiprocessing.util import Finalize
+from datetime import datetime
+from queue import SimpleQueue, Empty
+from config import log_file, log_level, log_flush_interval, log_batch_size
+
+LEVELS = {"TRACE": 0, "DEBUG": 10, "INFO": 20, "WARN": 30, "ERROR": 40}
+
+#Asks the writer thread to write what it has and stop
+END = object()
+
+#Lines kept for the log file while it isn't open yet, the oldest are dropped past it
+MAX_PENDING_LINES = 10000
+
+class LogWriter():
+    """
+    Writes the log from a background thread, in batches, to a JSON lines file and to the console
+    The callers only put a tuple in a queue, the messages are formatted and written by the writer thread
+    """
+
+    def __init__(self, path: str = log_file, level: str = log_level, flush_interval: float = log_flush_interval,
+                 batch_size: int = log_batch_size):
+        self.path = path
+        self.threshold = LEVELS.get(level, LEVELS["INFO"])
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.lock = threading.Lock()
+        self.pid = None
+        self.finalizer_pid = None
+        self.queue = None
+        self.thread = None
+        self.file = None
+        self.file_enabled = False
+        self.pending = []
+
+    def is_enabled_for(self, level: str):
+        return LEVELS.get(level, LEVELS["INFO"]) >= self.threshold
+
+    def write(self, level: str, message: str, console: bool = True, args: tuple = ()):
+        """
+        Queues a record, the message is formatted with the args only when it is written
+        """
+        #Worker processes inherit the writer without its thread, so each process starts its own
+        if self.pid != os.getpid():
+            self._start()
+        self.queue.put((time.time(), level, message, args, console, threading.current_thread().name))
+
+    def enable_file(self):
+        """
+        Starts writing the log file, with the records held until now
+        It is called once the output folder that holds the file was prepared, so a dry run never creates it
+        and the first records aren't lost when the folder is cleaned
+        """
+        self.file_enabled = True
+
+    def _start(self):
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.queue = SimpleQueue()
+            self.file = None
+            self.pending = []
+            self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self.pid = os.getpid()
+            self.thread.start()
+            #Worker processes leave with os._exit, which skips atexit, so they write the log from their own finalizer
+            if multiprocessing.current_process().name != "MainProcess" and self.finalizer_pid != self.pid:
+                self.finalizer_pid = self.pid
+                Finalize(self, LogWriter.close, args=(self,), exitpriority=100)
+
+    def _run(self):
+        queue = self.queue
+        while True:
+            batch = [queue.get()]
+            deadline = time.time() + self.flush_interval
+            while batch[-1] is not END and len(batch) < self.batch_size:
+                try:
+                    batch.append(queue.get(timeout=max(0, deadline - time.time())))
+                except Empty:
+                    break
+            self._flush(batch)
+            if batch[-1] is END:
+                return
+
+    def _flush(self, batch: list):
+        lines = []
+        console = []
+        for record in batch:
+            if record is END:
+                continue
+            created, level, message, args, echo, thread = record
+            if args:
+                try:
+                    message = message.format(*args)
+                except Exception:
+                    message = "{} {}".format(message, args)
+            lines.append(json.dumps({"time": datetime.fromtimestamp(created).isoformat(timespec="milliseconds"),
+                                     "level": level, "message": message, "thread": thread, "pid": self.pid}, ensure_ascii=False))
+            if echo:
+                console.append(message if level == "INFO" else "[ {} ] {}".format(level, message))
+
+        if console:
+            sys.__stdout__.write("\n".join(console) + "\n")
+            sys.__stdout__.flush()
+        if not self.path:
+            return
+        if not self.file_enabled:
+            self.pending.extend(lines)
+            del self.pending[:-MAX_PENDING_LINES]
+            return
+        if self.pending:
+            lines = self.pending + lines
+            self.pending = []
+        if lines:
+            try:
+                #The output folder is cleaned when the run starts, so the file is opened again if it was removed
+                if self.file is None or not os.path.exists(self.path):
+                    if self.file is not None:
+                        self.file.close()
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                    self.file = open(self.path, "a", encoding="utf-8")
+                self.file.write("\n".join(lines) + "\n")
+                self.file.flush()
+            except OSError as e:
+                sys.__stderr__.write("Couldn't write the log file {}: {}\n".format(self.path, str(e)))
+
+    def close(self):
+        """
+        Writes every queued record and stops the writer thread, a later record starts it again
+        """
+        with self.lock:
+            if self.pid != os.getpid() or not self.thread.is_alive():
+                return
+            self.queue.put(END)
+            self.thread.join(timeout=10)
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            self.pid = None
+
+log_writer = LogWriter()
+atexit.register(log_writer.close)
@@ -1,17 +1,45 @@
-from libraries.common import log_message, files, convert_string_to_date
-from config import OUTPUT_FOLDER, search_phrase, month_number, news_section, tabs_dict
-import os
+from libraries.common import log_message
+from libraries.nytimes.source import NewsSource
+from libraries.waits import WaitEngine
+from config import OUTPUT_FOLDER, max_result_pages, wait_timeouts, wait_optional_timeout
 from selenium.webdriver.common.keys import Keys
-from datetime import datetime, timedelta
-
-class Nytimes():
-
-    def __init__(self, rpa_selenium_instance, credentials:dict):
+from datetime import datetime
+
+#Walks the search results list once inside the browser and returns plain values,
+#so extracting N articles costs one WebDriver round trip instead of several per article
+SEARCH_RESULTS_SNAPSHOT_JS = """
+var items = document.evaluate('//ol[@data-testid="search-results"]/li[@data-testid]', document, null,
+    XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var text = function (node) { return node ? node.innerText.trim() : ""; };
+var records = [];
+for (var i = arguments[0]; i < items.snapshotLength; i++) {
+    var item = items.snapshotItem(i);
+    var image = item.querySelector("img");
+    var link = item.querySelector("a");
+    records.push({
+        "title": text(item.querySelector("h4")),
+        "date": text(item.querySelector('span[data-testid="todays-date"]')),
+        "description": text(item.querySelector("a p")),
+        "image": image ? image.src : "",
+        "link": link ? link.href : ""
+    });
+}
+return records;
+"""
+
+class Nytimes(NewsSource):
+
+    def __init__(self, rpa_selenium_instance, credentials:dict, query:dict = None, output_folder:str = OUTPUT_FOLDER):
+        super().__init__(credentials, query, output_folder)
         self.browser = rpa_selenium_instance
-        self.nytimes_url = credentials["url"]
-        self.articles_container = []
-        self.results_data = []
-        self.images_links = []
+        self.waits = WaitEngine(rpa_selenium_instance, timeouts = wait_timeouts)
+
+    def extract_results_snapshot(self, offset: int = 0):
+        """
+        Pull every search result from the page into plain records with a single JavaScript call
+        """
+        records = self.browser.execute_javascript(SEARCH_RESULTS_SNAPSHOT_JS, "ARGUMENTS", offset)
+        return records or []
 
     def access_nytimes(self):
         """
@@ -25,13 +53,12 @@ class Nytimes():
         """
         Search in the page with a Keyword given
         """
-        log_message("Start - Initial Search of '{}'".format(search_phrase))
+        log_message("Start - Initial Search of '{}'".format(self.search_phrase))
         
-        self.browser.click_element('//button[@data-test-id = "search-button"]')
-        search_bar = self.browser.find_element('//input[@data-testid = "search-input"]')
-        self.browser.input_text_when_element_is_visible('//input[@data-testid = "search-input"]', search_phrase)
+        self.waits.click('//button[@data-test-id = "search-button"]')
+        search_bar = self.waits.input_text('//input[@data-testid = "search-input"]', self.search_phrase)
         search_bar.send_keys(Keys.ENTER) 
-        log_message("End - Initial Search of '{}'".format(search_phrase))   
+        log_message("End - Initial Search of '{}'".format(self.search_phrase))   
 
     def filter_page(self):
         """
@@ -39,47 +66,43 @@ class Nytimes():
         """
         log_message("Start - Set the Filters")
 
-        self.browser.click_element('//button[descendant::text()="Section"]')
+        self.waits.click('//button[descendant::text()="Section"]')
 
         #Here, it tries to find the section that was entered as a environmental variable
         try:
-            self.browser.find_element('//ul[@tabindex=-1]//label[descendant::text()="{}"]/input'.format(news_section))
-            self.browser.click_element('//ul[@tabindex=-1]//label[descendant::text()="{}"]/input'.format(news_section))
-            log_message("Filtered the news by Section '{}'".format(news_section))
+            self.waits.click('//ul[@tabindex=-1]//label[descendant::text()="{}"]/input'.format(self.news_section), wait_optional_timeout)
+            log_message("Filtered the news by Section '{}'".format(self.news_section))
         except Exception as e:
             #If it couldn't find that section, it defaults to "Any"
-            log_message("Couldn't find Section '{}'. Filtered by 'Any'".format(news_section))
-            self.browser.click_element('//ul[@tabindex=-1]//label[descendant::text()="Any"]/input')
+            log_message("Couldn't find Section '{}'. Filtered by 'Any'".format(self.news_section))
+            self.waits.click('//ul[@tabindex=-1]//label[descendant::text()="Any"]/input')
         
         #This try-except block is there just in case the "Cookies pop-up" shows up
         try:
-            hide_button = self.browser.find_element('//button[@data-testid="expanded-dock-btn-selector"]')
-            self.browser.click_element(hide_button)
+            hide_button = self.waits.clickable('//button[@data-testid="expanded-dock-btn-selector"]', wait_optional_timeout)
+            self.waits.click(hide_button)
             log_message("Clicked the button to hide the pop-up")
-            self.browser.click_element('//button[@data-testid="GDPR-accept"]')
+            self.waits.click('//button[@data-testid="GDPR-accept"]', wait_optional_timeout)
             log_message("Clicked the accept button, if it is still there")
         except:
             #In case the pop-up doesn't show up, sends the message and keeps going
             log_message("Didn't find the pop-up")  
 
-        self.browser.click_element('//select[@data-testid="SearchForm-sortBy"]')
-        self.browser.click_element('//option[@value="newest"]')
+        self.waits.click('//select[@data-testid="SearchForm-sortBy"]')
+        self.waits.click('//option[@value="newest"]')
 
         log_message("End - Set the Filters")
 
-    def find_dates(self):
+    def find_dates(self, start_date: datetime = None, end_date: datetime = None):
         """
         Find the articles that meet the specified date criteria
+        By default it searches from the date given by the number of months until today
         """
         log_message("Start - Find the Articles")
 
-        search_date = datetime.now()
-
-        #Given the environmental variable month_number, creates the latest date to check
-        if int(month_number) > 1:
-            search_date = search_date - timedelta(days= (int(month_number)-1)*30)
-        else:
-            search_date = search_date - timedelta(days=datetime.now().day)
+        whole_range = start_date is None and end_date is None
+        search_date = start_date or self.get_search_date()
+        end_date = end_date or datetime.now()
 
         #Transforms both todays date and the start date to the format required
         if search_date.day < 10:
@@ -95,197 +118,71 @@ class Nytimes():
         start_date_year = search_date.year
         search_date_start_value = str(start_date_month)+"/"+str(start_date_day)+"/"+str(start_date_year)
 
-        if datetime.now().day < 10:
-            end_date_day = "0{}".format(datetime.now().day)
+        if end_date.day < 10:
+            end_date_day = "0{}".format(end_date.day)
         else:
-            end_date_day = search_date.day
+            end_date_day = end_date.day
 
-        if datetime.now().month < 10:
-            end_date_month = "0{}".format(datetime.now().month)
+        if end_date.month < 10:
+            end_date_month = "0{}".format(end_date.month)
         else:
-            end_date_month = search_date.month
+            end_date_month = end_date.month
 
-        end_date_year = datetime.now().year
+        end_date_year = end_date.year
         search_date_end_value = str(end_date_month)+"/"+str(end_date_day)+"/"+str(end_date_year)
 
-        self.browser.click_element('//button[descendant::text()="Date Range"]')
-        self.browser.click_element('//button[@value="Specific Dates"]')
-        self.browser.find_element('//div[@data-testid="search-day-picker"]//input[@data-testid="DateRange-startDate"]')
-        self.browser.input_text_when_element_is_visible('//div[@data-testid="search-day-picker"]//input[@data-testid="DateRange-startDate"]', search_date_start_value)
+        self.waits.click('//button[descendant::text()="Date Range"]')
+        self.waits.click('//button[@value="Specific Dates"]')
+        self.waits.input_text('//div[@data-testid="search-day-picker"]//input[@data-testid="DateRange-startDate"]', search_date_start_value)
         if search_date.day == 31:
-            self.browser.click_element('//div[@data-testid="search-day-picker"]//div[text()="28"]') 
+            self.waits.click('//div[@data-testid="search-day-picker"]//div[text()="28"]') 
         else:
-            self.browser.click_element('//div[@data-testid="search-day-picker"]//div[text()="{}"]'.format(search_date.day)) 
-        self.browser.input_text_when_element_is_visible('//div[@data-testid="search-day-picker"]//input[@data-testid="DateRange-endDate"]', search_date_end_value) 
-        self.browser.click_element('//div[@data-testid="search-day-picker"]//div[text()="{}"]'.format(datetime.now().day)) 
+            self.waits.click('//div[@data-testid="search-day-picker"]//div[text()="{}"]'.format(search_date.day)) 
+        self.waits.input_text('//div[@data-testid="search-day-picker"]//input[@data-testid="DateRange-endDate"]', search_date_end_value) 
+        self.waits.click('//div[@data-testid="search-day-picker"]//div[text()="{}"]'.format(end_date.day)) 
         
-        #Clicks the "Show more" button while it exists
-        #Since we've already done the date filter, this will give us back all the results
-        data_range = True
-        size = 0
-        all_articles = ""
-        while data_range:
+        #Since the results are sorted by newest, it walks them incrementally: after each "Show more" click
+        #it only checks the newly appended articles, and stops as soon as one falls before the search date
+        articles_seen = 0
+        pages_loaded = 1
+        keep_loading = True
+        while keep_loading:
+            new_articles = self.extract_results_snapshot(offset = articles_seen)
+            articles_seen += len(new_articles)
+
+            keep_loading = self.collect_articles(new_articles, search_date, use_index = whole_range)
+
+            if not keep_loading:
+                break
+            if max_result_pages and pages_loaded >= max_result_pages:
+                log_message("Reached the limit of {} result pages".format(max_result_pages))
+                self.search_capped = True
+                break
+
+            #After the last page the "Show more" button is gone, so it checks once instead of waiting for it
+            if not self.waits.exists('//button[@data-testid="search-show-more-button"]'):
+                break
+
             try:
-                #Clicks the "Show more" button while it exists
-                self.browser.click_element('//button[@data-testid="search-show-more-button"]')
+                #Clicks the "Show more" button and lets the page notify when the next articles are appended
+                self.waits.click('//button[@data-testid="search-show-more-button"]', wait_optional_timeout)
+                loaded = self.waits.count_more_than('//ol[@data-testid="search-results"]/li[@data-testid]', articles_seen)
+                keep_loading = loaded > articles_seen
+                pages_loaded += 1
             except:
-                #Once the "Show more" button no longer exists, it changes the value
-                data_range = False
+                #Once the "Show more" button no longer exists there are no more results
+                keep_loading = False
 
-        try:
-            #Once it has loaded all the news in the given timeframe, checks the date individually
-            #Appends all the articles that are between that timeframe
-            all_articles = self.browser.find_elements('//ol[@data-testid="search-results"]/li[@data-testid]')
-        except:
+        if articles_seen == 0:
             #This means that there are no articles with this parameters
             log_message("Found no articles with this filters")
-        
-        size = len(all_articles)
-        articles_processed = 0
-        continue_appending = True
-        while size > articles_processed and continue_appending:
-            article_date_text = self.browser.find_element('xpath:.//span[@data-testid="todays-date"]',parent=all_articles[articles_processed]).text
-            article_date_elements = article_date_text.split(" ")
-            
-            if article_date_elements[1] == "ago":
-                article_date = datetime.now()
-            else:
-                article_date = convert_string_to_date(article_date_text)
-            
-            if article_date > search_date:
-                self.articles_container.append(all_articles[articles_processed])
-                articles_processed += 1
-            else:
-                continue_appending = False
-
-        log_message("End - Find the Articles")
-        
-    def get_articles_information(self):
-        """
-        Obtain the information of all the articles
-        """
-        log_message("Start - Get the Articles Information")
-
-        #With the articles found with the last method, grabs all the information of each new
-        for article_container in self.articles_container:
-            self.browser.switch_window(locator = self.browser.get_window_handles()[tabs_dict["NY Times"]])
-            article_title = self.browser.find_element('xpath:.//h4',parent=article_container).text
-            article_date = self.browser.find_element('xpath:.//span[@data-testid="todays-date"]',parent=article_container).text
-            
-            #This two try-except blocks check if the article has a description and image
-            #If it hasn't, it sends a message to the log, and keeps going
-            try:
-                article_description = self.browser.find_element('xpath:.//a/p',parent=article_container).text
-            except Exception as e:
-                #This means that the article has no description
-                article_description = ""
-                log_message("Article {} has no description".format(article_title))               
-            
-            try:
-                article_image = self.browser.find_element('xpath:.//img',parent=article_container).get_attribute("src")
-            except Exception as e:
-                #This means that the article has no image
-                article_image = ""    
-                log_message("Article {} has no image".format(article_title))
-
-            keyword_count = len(article_title.split(search_phrase)) - 1
-            keyword_count = keyword_count + len(article_description.split(search_phrase)) -1
 
-            has_money = False
-            money_in_title = "$" in article_title or "dollar" in article_title or "USD" in article_title
-            money_in_description = "$" in article_description or "dollar" in article_description or "USD" in article_description
-            if money_in_title:
-                sign_in_title = article_title.split("$")
-                dollar_in_title = article_title.split("dollar")
-                usd_in_title = article_title.split("USD")
-                if len(sign_in_title) > 1 and has_money == False:
-                    number_after_sign = sign_in_title[1].split(" ")
-                    try:
-                        number_after_sign =number_after_sign[0].replace(",", "")
-                        float(number_after_sign)
-                        has_money = True
-                    except:
-                        #This means that, even if they found the keyword, it's not a number, so it shouldn't be counted
-                        print("{} has '$' in the title, but it isn't a number".format(article_title))                    
-                if len(dollar_in_title) > 1 and has_money == False:
-                    number_before_dollar = dollar_in_title[0].split(" ")
-                    try:
-                        float(number_before_dollar[-1].replace(",", ""))
-                        has_money = True
-                    except:
-                        #This means that, even if they found the keyword, it's not a number, so it shouldn't be counted
-                        print("{} has 'dollar' in the title, but it isn't a number".format(article_title)) 
-                if len(usd_in_title) > 1 and has_money == False:
-                    number_before_usd = usd_in_title[1].split(" ")
-                    try:
-                        float(number_before_usd[-1].replace(",", ""))
-                        has_money = True
-                    except:
-                        #This means that, even if they found the keyword, it's not a number, so it shouldn't be counted
-                        print("{} has 'USD' in the title, but it isn't a number".format(article_title)) 
-            elif money_in_description:
-                sign_in_description = article_description.split("$")
-                dollar_in_description = article_description.split("dollar")
-                usd_in_description = article_description.split("USD")
-                if len(sign_in_description) > 1 and has_money == False:
-                    number_after_sign = sign_in_description[1].split(" ")
-                    try:
-                        number_after_sign = number_after_sign[0].replace(",", "")
-                        float(number_after_sign)
-                        has_money = True
-                    except:
-                        #This means that, even if they found the keyword, it's not a number, so it shouldn't be counted
-                        print("{} has '$' in the description, but it isn't a number".format(article_title)) 
-                if len(dollar_in_description) > 1 and has_money == False:
-                    number_before_dollar = dollar_in_description[0].split(" ")
-                    try:
-                        float(number_before_dollar[-1].replace(",", ""))
-                        has_money = True
-                    except:
-                        #This means that, even if they found the keyword, it's not a number, so it shouldn't be counted
-                        print("{} has 'dollar' in the description, but it isn't a number".format(article_title)) 
-                if len(usd_in_description) > 1 and has_money == False:
-                    number_before_usd = usd_in_description[0].split(" ")
-                    try:
-                        float(number_before_usd[-1].replace(",", ""))
-                        has_money = True
-                    except:
-                        #This means that, even if they found the keyword, it's not a number, so it shouldn't be counted
-                        print("{} has 'USD' in the description, but it isn't a number".format(article_title)) 
+        if whole_range:
+            self.finish_search(search_date)
 
-            #Once it has all the information, opens the image in a new window and downloads it
-            if article_image != "":
-                self.browser.execute_javascript("window.open()")
-                self.browser.switch_window(locator = "NEW")
-                tabs_dict["Article Image"] = len(tabs_dict)
-                self.browser.go_to(article_image)
-                image_name = article_image.split("/")[-1].split("?")[0]
-
-                with open('{}/{}'.format(OUTPUT_FOLDER, image_name), 'wb') as file:
-                    image = self.browser.find_element("//img")
-                    file.write(image.screenshot_as_png)
-                
-                log_message("Succesfully downloaded {}".format(image_name))
-            else:
-                image_name = ""
-                log_message("Couldn't find image for {}".format(article_title))
-
-            #Finally, appends all the information to a list of dictionaries
-            self.results_data.append({"Title":article_title, "Date": article_date, "Description": article_description,
-            "Image Link": article_image, "Keyword count": keyword_count, "Has Currency": has_money, "Image Name": image_name})
-
-        log_message("End - Get the Articles Information")        
+        log_message("End - Find the Articles")
 
-    def create_excel(self):
-        """
-        Create the Excel file with the information
-        """
-        #Given the list of dictionaries, create the Excel with all the information
-        log_message("Start - Create Excel")
-        files.create_workbook(path = os.path.join(OUTPUT_FOLDER, "News.xlsx"))
-        files.create_worksheet(name = "Results", content= None, exist_ok = True, header = False)
-        files.append_rows_to_worksheet(self.results_data, name = "Results", header = True, start= None)
-        files.remove_worksheet(name = "Sheet")
-        files.save_workbook(path = None)
-        files.close_workbook()
-        log_message("End - Create Excel")
+    def close(self):
+        super().close()
+        if self.waits.stats:
+            log_message("Time waited per locator:\n{}".format(self.waits.get_summary()))
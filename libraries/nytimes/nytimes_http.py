@@ -0,0 +1,172 @@
+from libraries.common import log_message
+from libraries.nytimes.source import NewsSource
+from libraries.article_index import ArticleIndex
+from libraries.tracing import tracer
+from config import OUTPUT_FOLDER, max_result_pages, search_http_timeout, nytimes_api_key
+from datetime import datetime
+from urllib.parse import urljoin
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import html
+
+ARTICLE_SEARCH_PATH = "svc/search/v2/articlesearch.json"
+
+class NytimesHttp(NewsSource):
+    """
+    Searches the news directly over HTTP, without a browser
+    The search endpoint receives the Article Search API parameters (q, fq, sort, begin_date, end_date, page)
+    and may answer either with the Article Search API JSON or with the search results HTML page
+    """
+
+    def __init__(self, credentials:dict, query:dict = None, output_folder:str = OUTPUT_FOLDER):
+        super().__init__(credentials, query, output_folder)
+        #The search page of the site ignores the Article Search API parameters, so the API is the default
+        self.search_url = credentials.get("search_url") or urljoin(self.nytimes_url, ARTICLE_SEARCH_PATH)
+        self.search_params = {}
+        self.session = None
+
+    def access_nytimes(self):
+        """
+        Create the pooled HTTP session used for the search requests
+        """
+        log_message("Start - Access NY Times")
+        retry = Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(["GET"]))
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(max_retries=retry))
+        self.session.mount("https://", HTTPAdapter(max_retries=retry))
+        log_message("End - Access NY Times")
+
+    def initial_search(self):
+        """
+        Search with a Keyword given
+        """
+        log_message("Start - Initial Search of '{}'".format(self.search_phrase))
+        self.search_params["q"] = self.search_phrase
+        if nytimes_api_key:
+            self.search_params["api-key"] = nytimes_api_key
+        log_message("End - Initial Search of '{}'".format(self.search_phrase))
+
+    def filter_page(self):
+        """
+        Set the filters for the search
+        """
+        log_message("Start - Set the Filters")
+        if self.news_section and self.news_section != "Any":
+            self.search_params["fq"] = 'section_name:("{}")'.format(self.news_section)
+            log_message("Filtered the news by Section '{}'".format(self.news_section))
+        self.search_params["sort"] = "newest"
+        log_message("End - Set the Filters")
+
+    def find_dates(self, start_date: datetime = None, end_date: datetime = None):
+        """
+        Find the articles that meet the specified date criteria
+        By default it searches from the date given by the number of months until today
+        """
+        log_message("Start - Find the Articles")
+
+        whole_range = start_date is None and end_date is None
+        search_date = start_date or self.get_search_date()
+        self.search_params["begin_date"] = search_date.strftime("%Y%m%d")
+        self.search_params["end_date"] = (end_date or datetime.now()).strftime("%Y%m%d")
+
+        #The results come sorted by newest, so it stops requesting pages as soon as one article falls before the search date
+        page = 0
+        keep_loading = True
+        seen = set()
+        while keep_loading:
+            #An endpoint that ignores the page parameter answers the same results again, so repeated articles are dropped
+            #and a page without any new article ends the search
+            new_articles = []
+            for article in self.get_results_page(page):
+                key = ArticleIndex.article_key(article)
+                if key not in seen:
+                    seen.add(key)
+                    new_articles.append(article)
+            if not new_articles:
+                break
+
+            keep_loading = self.collect_articles(new_articles, search_date, use_index = whole_range)
+
+            page += 1
+            if keep_loading and max_result_pages and page >= max_result_pages:
+                log_message("Reached the limit of {} result pages".format(max_result_pages))
+                self.search_capped = True
+                break
+
+        if not self.articles_found:
+            #This means that there are no articles with this parameters
+            log_message("Found no articles with this filters")
+
+        if whole_range:
+            self.finish_search(search_date)
+
+        log_message("End - Find the Articles")
+
+    def get_results_page(self, page: int):
+        """
+        Request one page of results and return them as records
+        """
+        params = dict(self.search_params, page=page)
+        with tracer.span("search_page", "http", page=page):
+            response = self.session.get(self.search_url, params=params, timeout=search_http_timeout)
+            if response.raw.retries is not None:
+                tracer.count("search retries", len(response.raw.retries.history))
+            response.raise_for_status()
+        tracer.count("bytes downloaded", len(response.content))
+
+        if "json" in response.headers.get("Content-Type", ""):
+            return self.parse_json_results(response.json())
+        return self.parse_html_results(response.content, response.url)
+
+    def parse_json_results(self, content: dict):
+        """
+        Transform the documents of an Article Search API answer into records
+        """
+        records = []
+        for document in (content.get("response") or {}).get("docs") or []:
+            published = datetime.strptime(document["pub_date"][:10], "%Y-%m-%d")
+            image = ""
+            for media in document.get("multimedia") or []:
+                if media.get("url"):
+                    image = urljoin("https://static01.nyt.com/", media["url"])
+                    break
+            records.append({
+                "title": (document.get("headline") or {}).get("main") or "",
+                #Uses the same date format shown in the search page, so both sources are parsed alike
+                "date": "{} {}, {}".format(published.strftime("%B"), published.day, published.year),
+                "description": document.get("abstract") or document.get("snippet") or "",
+                "image": image,
+                "link": document.get("web_url") or ""
+            })
+        return records
+
+    def parse_html_results(self, content: bytes, base_url: str):
+        """
+        Transform the items of the search results page into records
+        """
+        def text(item, path):
+            nodes = item.xpath(path)
+            return nodes[0].text_content().strip() if nodes else ""
+
+        def attribute(item, path):
+            values = item.xpath(path)
+            return urljoin(base_url, values[0]) if values else ""
+
+        document = html.fromstring(content)
+        records = []
+        for item in document.xpath('//ol[@data-testid="search-results"]/li[@data-testid]'):
+            records.append({
+                "title": text(item, './/h4'),
+                "date": text(item, './/span[@data-testid="todays-date"]'),
+                "description": text(item, './/a/p'),
+                "image": attribute(item, './/img/@src'),
+                "link": attribute(item, './/a/@href')
+            })
+        return records
+
+    def close(self):
+        super().close()
+        if self.session:
+            self.session.close()
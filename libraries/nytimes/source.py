@@ -0,0 +1,315 @@
+from libraries.common import log_message, get_article_date
+from libraries.downloader import get_file_hash
+from libraries.analyzer import TextAnalyzer
+from libraries.sinks import create_sink
+from libraries.article_index import ArticleIndex
+from libraries.checkpoint import Checkpoint
+from config import (OUTPUT_FOLDER, month_number, search_phrase, news_section, search_keywords, keyword_case_sensitive,
+                    output_format, max_results, incremental, article_index_path)
+import os
+from datetime import datetime, timedelta
+
+RESULT_COLUMNS = ["Title", "Date", "Description", "Image Link", "Keyword count", "Has Currency", "Image Name"]
+
+class NewsSource():
+    """
+    Base class of the places the news are searched in
+    Subclasses find records of title, date, description, image and link and pass them to collect_articles,
+    which streams them to the pipeline when it is running, or keeps them in self.articles_container
+    """
+
+    def __init__(self, credentials:dict, query:dict = None, output_folder:str = OUTPUT_FOLDER):
+        self.nytimes_url = credentials["url"]
+        self.articles_container = []
+        self.articles_found = 0
+        self.found_keys = set()
+        self.pipeline = None
+        self.checkpoint = None
+        #Set when resuming a checkpoint, the keys of the rows already written and whether the search had finished
+        self.resumed = False
+        self.written_keys = set()
+        self.search_done = False
+        self.search_date = None
+        self.sink = None
+        self.results_path = ""
+        self.results_count = 0
+        self.output_folder = output_folder
+
+        #The query defaults to the one in the environmental variables
+        query = query or {}
+        self.search_phrase = query.get("search_phrase", search_phrase)
+        self.news_section = query.get("news_section", news_section)
+        self.month_number = query.get("month_number", month_number)
+        self.search_keywords = query.get("search_keywords") or (search_keywords if self.search_phrase == search_phrase else [self.search_phrase])
+
+        self.analyzer = TextAnalyzer(self.search_keywords, keyword_case_sensitive)
+        self.analysis_key = "{}|{}".format(",".join(sorted(self.search_keywords)), keyword_case_sensitive)
+        self.query_key = "{}|{}".format(self.search_phrase, self.news_section)
+        self.index = ArticleIndex(article_index_path) if incremental else None
+        self.covered_since = self.index.get_covered_since(self.query_key) if self.index is not None else None
+        self.search_capped = False
+        self.reached_index = False
+
+    def access_nytimes(self):
+        raise NotImplementedError
+
+    def initial_search(self):
+        raise NotImplementedError
+
+    def filter_page(self):
+        raise NotImplementedError
+
+    def find_dates(self, start_date: datetime = None, end_date: datetime = None):
+        raise NotImplementedError
+
+    def enable_checkpoint(self, resume: bool = False):
+        """
+        Saves the progress of the run as it goes, continuing the last checkpoint of the same query when resuming
+        """
+        checkpoint = Checkpoint(self.output_folder)
+        query = {"search_phrase": self.search_phrase, "news_section": self.news_section,
+                 "month_number": self.month_number, "search_keywords": self.search_keywords}
+        state = checkpoint.load() if resume else None
+        if resume and state is None:
+            log_message("There is no checkpoint to resume from, starting over")
+        elif state is not None and state["query"] != query:
+            log_message("The checkpoint is of another query, starting over")
+            state = None
+
+        if state is None:
+            checkpoint.start(query, self.get_search_date())
+        else:
+            self.resumed = True
+            self.search_date = datetime.fromisoformat(state["search_date"])
+            self.search_done = state["phase"] != "searching"
+            checkpoint.resume(state)
+            log_message("Resuming the checkpoint with {} results written{}".format(
+                state["rows"], ", the search had finished" if self.search_done else ""))
+        self.checkpoint = checkpoint
+
+    def close(self):
+        """
+        Release whatever the source holds open, the browser itself is closed by the Process
+        If the run failed midway, this saves the results written so far
+        """
+        if self.pipeline is not None:
+            pipeline = self.pipeline
+            self.pipeline = None
+            try:
+                pipeline.finish()
+            except Exception as e:
+                log_message("Couldn't write every result: {}".format(str(e)), "ERROR")
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+            self.checkpoint = None
+
+    def get_search_date(self):
+        """
+        Returns the oldest date an article can have to be part of the results
+        It is kept for the whole run, so a resumed run searches the same range
+        """
+        if self.search_date is not None:
+            return self.search_date
+        search_date = datetime.now()
+
+        #Given the number of months of the query, creates the latest date to check
+        if int(self.month_number) > 1:
+            search_date = search_date - timedelta(days= (int(self.month_number)-1)*30)
+        else:
+            search_date = search_date - timedelta(days=datetime.now().day)
+        self.search_date = search_date
+        return search_date
+
+    def collect_articles(self, new_articles: list, search_date: datetime, use_index: bool = True):
+        """
+        Appends the articles newer than the search date, and returns whether more results should be loaded
+        Since the results are sorted by newest, it stops at the first article that falls before the search date
+        """
+        for article in new_articles:
+            if get_article_date(article["date"]) <= search_date:
+                return False
+
+            #Once it reaches an article from a previous complete run, all the older ones are already in the index
+            if use_index and self.index_covers(search_date) and self.index.get(self.query_key, article) is not None:
+                log_message("Found articles from a previous run, the older ones come from the index")
+                self.reached_index = True
+                return False
+
+            self.add_article(article)
+            if max_results and self.articles_found >= max_results:
+                log_message("Reached the limit of {} results".format(max_results))
+                self.search_capped = True
+                return False
+        return True
+
+    def add_article(self, article: dict):
+        """
+        Sends a found article to the pipeline, or keeps it for get_articles_information if it isn't running
+        """
+        self.articles_found += 1
+        if self.index is not None:
+            #Only the keys are kept, to complete the search with the index without duplicates
+            self.found_keys.add(ArticleIndex.article_key(article))
+        if self.pipeline is not None:
+            self.queue_article(article)
+        else:
+            self.articles_container.append(article)
+
+    def queue_article(self, article: dict):
+        """
+        Sends an article to the pipeline, unless its row was written before the run was resumed
+        """
+        if self.checkpoint is not None and not self.search_done:
+            self.checkpoint.add_article(article)
+        if self.written_keys and ArticleIndex.article_key(article) in self.written_keys:
+            return
+        self.pipeline.put(article)
+
+    def index_covers(self, search_date: datetime):
+        """
+        Returns whether a previous run scraped this query completely down to the search date
+        """
+        return self.covered_since is not None and self.covered_since <= search_date
+
+    def finish_search(self, search_date: datetime):
+        """
+        Completes the articles found with the ones stored in the index, and records how far the search went
+        """
+        if self.index is None:
+            return
+        if self.reached_index:
+            for article in self.index.get_articles(self.query_key, search_date):
+                if ArticleIndex.article_key(article) not in self.found_keys:
+                    self.add_article(article)
+        elif not self.search_capped:
+            self.index.set_covered_since(self.query_key, search_date)
+
+    def start_pipeline(self):
+        """
+        Starts the pipeline, so the articles are analyzed, their images downloaded and their rows written
+        while the search is still finding more
+        """
+        if self.pipeline is not None:
+            return
+        from libraries.pipeline import ArticlePipeline
+        if self.sink is None:
+            self.sink = create_sink(output_format, self.output_folder, RESULT_COLUMNS)
+            if self.resumed:
+                #The results file is written again from the start, with the rows of the checkpoint first
+                for key, row in self.checkpoint.read_rows():
+                    self.sink.write(row)
+                    self.written_keys.add(key)
+        self.pipeline = ArticlePipeline(self)
+
+    def get_articles_information(self):
+        """
+        Obtain the information of all the articles, writing each one to the results as soon as it is complete
+        The articles that weren't streamed during the search go through the pipeline now
+        """
+        log_message("Start - Get the Articles Information")
+
+        self.start_pipeline()
+        if self.search_done and self.checkpoint is not None:
+            #Resumed after the search had finished, so the articles come from the checkpoint instead
+            for article in self.checkpoint.read_articles():
+                self.articles_found += 1
+                self.queue_article(article)
+        else:
+            articles, self.articles_container = self.articles_container, []
+            for article in articles:
+                self.queue_article(article)
+            del articles
+            if self.checkpoint is not None:
+                self.checkpoint.set_phase("searched")
+        self.search_done = True
+
+        pipeline = self.pipeline
+        self.pipeline = None
+        pipeline.finish()
+        if self.checkpoint is not None:
+            self.checkpoint.set_phase("written")
+
+        log_message("End - Get the Articles Information")
+
+    def get_reusable_row(self, record):
+        """
+        Returns the indexed row and image hash of an article from a previous run if it can be written as it is, or None
+        """
+        if self.index is None:
+            return None
+        indexed = self.index.get(self.query_key, record.to_article())
+        if indexed is not None and self.is_reusable(indexed):
+            return indexed
+        return None
+
+    def is_reusable(self, indexed: dict):
+        """
+        Returns whether an indexed row can be written as it is
+        """
+        if indexed["analysis_key"] != self.analysis_key:
+            return False
+        image_name = indexed["row"]["Image Name"]
+        if not image_name:
+            #A missing image name with an image link means the download failed, so it is tried again
+            return not indexed["row"]["Image Link"]
+        return get_file_hash(os.path.join(self.output_folder, image_name)) == indexed["image_hash"]
+
+    def write_record(self, record):
+        """
+        Waits for the image of the article, if it has one, and writes its row to the results
+        The rows reused from the index are written as they are, since they are already stored there
+        """
+        if record.row is not None:
+            self.sink.write(record.row)
+            if self.checkpoint is not None:
+                self.checkpoint.add_row(ArticleIndex.article_key(record.to_article()), record.row)
+            #Stored again for the current query, so it keeps finding it in the next runs
+            self.save_to_index(record, record.row, record.image_hash)
+            return
+
+        row = record.to_row()
+        image_hash = ""
+        if record.download is not None:
+            image_hash, error = record.download.result()
+            if error is None:
+                log_message("Succesfully downloaded {}", "DEBUG", args = (record.image_name,))
+            else:
+                log_message("Couldn't download {}: {}", "WARN", args = (record.image_name, error))
+                row["Image Name"] = ""
+            #The future is shared with the other articles of the same image, this record no longer needs it
+            record.download = None
+        self.sink.write(row)
+        if self.checkpoint is not None:
+            self.checkpoint.add_row(ArticleIndex.article_key(record.to_article()), row)
+
+        self.save_to_index(record, row, image_hash)
+
+    def save_to_index(self, record, row: dict, image_hash: str):
+        """
+        Stores the row of an article under the current query, when the run is incremental
+        """
+        if self.index is not None:
+            self.index.save(self.query_key, get_article_date(record.date), record.to_article(), row, self.analysis_key, image_hash)
+            if self.sink.rows_written % 100 == 0:
+                self.index.commit()
+
+    def create_excel(self):
+        """
+        Close the results file, so everything written is saved
+        """
+        log_message("Start - Create Excel")
+        if self.sink is not None:
+            self.sink.close()
+            log_message("Saved {} results in {}".format(self.sink.rows_written, self.sink.path))
+            self.results_path = self.sink.path
+            self.results_count = self.sink.rows_written
+            self.sink = None
+        if self.index is not None:
+            self.index.commit()
+        log_message("End - Create Excel")
@@ -0,0 +1,145 @@
+import os, threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from queue import Queue
+from libraries.common import log_message
+from libraries.downloader import ImageDownloader, get_image_name, get_file_hash
+from libraries.tracing import tracer
+from config import pipeline_queue_size
+
+#Marks the end of the articles in every queue
+END = object()
+#Number of image names remembered, so an image shared by several articles is downloaded once
+RECENT_IMAGES = 4096
+
+class ArticleRecord():
+    """
+    Compact record of an article while it moves through the pipeline
+    """
+    __slots__ = ("title", "date", "description", "image", "link", "keyword_count", "has_money", "image_name", "image_hash", "download", "row")
+
+    def __init__(self, article: dict):
+        self.title = article["title"]
+        self.date = article["date"]
+        self.description = article["description"]
+        self.image = article["image"]
+        self.link = article.get("link", "")
+        self.keyword_count = 0
+        self.has_money = False
+        self.image_name = ""
+        self.image_hash = ""
+        self.download = None
+        #Only set for the rows reused from the article index
+        self.row = None
+
+    def to_article(self):
+        return {"title": self.title, "date": self.date, "description": self.description, "image": self.image, "link": self.link}
+
+    def to_row(self):
+        return {"Title": self.title, "Date": self.date, "Description": self.description, "Image Link": self.image,
+                "Keyword count": self.keyword_count, "Has Currency": self.has_money, "Image Name": self.image_name}
+
+class ArticlePipeline():
+    """
+    Streams the articles of a source through concurrent stages connected by bounded queues:
+    text analysis, then image download, then writing to the results
+    A full queue blocks the stage that feeds it, so only a fixed number of articles is in memory
+    no matter how many results the search has, and the articles are written in the order they were found
+    """
+
+    def __init__(self, source, queue_size: int = pipeline_queue_size):
+        self.source = source
+        self.downloader = ImageDownloader(source.output_folder)
+        self.recent_images = OrderedDict()
+        self.error = None
+
+        analysis_queue = Queue(max(1, queue_size))
+        image_queue = Queue(max(1, queue_size))
+        #The writer waits for the images in order, so this queue is also the window of downloads in flight
+        write_queue = Queue(self.downloader.workers * 4)
+        self.input_queue = analysis_queue
+        self.threads = [
+            threading.Thread(target=self._run, args=("analyze", self.analyze, analysis_queue, image_queue), daemon=True),
+            threading.Thread(target=self._run, args=("fetch_image", self.fetch_image, image_queue, write_queue), daemon=True),
+            threading.Thread(target=self._run, args=("write", source.write_record, write_queue, None), daemon=True)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def put(self, article: dict):
+        """
+        Queues an article, blocking while the pipeline is full
+        """
+        if self.error is not None:
+            raise self.error
+        self.input_queue.put(ArticleRecord(article))
+
+    def finish(self):
+        """
+        Waits until every queued article is written, and raises the error of the first stage that failed
+        """
+        self.input_queue.put(END)
+        for thread in self.threads:
+            thread.join()
+        self.downloader.close()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self, name: str, stage, input_queue: Queue, output_queue: Queue):
+        while True:
+            record = input_queue.get()
+            if record is END:
+                if output_queue is not None:
+                    output_queue.put(END)
+                return
+            #Once a stage fails, the rest of the articles are drained so the producer never blocks forever
+            if self.error is not None:
+                continue
+            try:
+                with tracer.span(name, "pipeline"):
+                    stage(record)
+                if output_queue is not None:
+                    output_queue.put(record)
+            except Exception as e:
+                log_message("The {} stage failed on '{}': {}".format(name, record.title, str(e)), "ERROR")
+                self.error = e
+
+    def analyze(self, record: ArticleRecord):
+        """
+        Counts the keywords and looks for money in the article, unless its row can be reused from the index
+        """
+        indexed = self.source.get_reusable_row(record)
+        if indexed is not None:
+            record.row = indexed["row"]
+            record.image_hash = indexed["image_hash"]
+            return
+
+        #If the article has no description, it sends a message to the log, and keeps going
+        if not record.description:
+            log_message("Article {} has no description", args = (record.title,))
+        record.keyword_count, record.has_money = self.source.analyzer.analyze(record.title, record.description)
+
+    def fetch_image(self, record: ArticleRecord):
+        """
+        Queues the image of the article to be downloaded in the background
+        """
+        if record.row is not None:
+            return
+        if not record.image:
+            log_message("Couldn't find image for {}", args = (record.title,))
+            return
+
+        record.image_name = get_image_name(record.image)
+        download = self.recent_images.get(record.image_name)
+        if download is None and self.source.resumed:
+            #Images are only saved once complete, so the ones from before the run was resumed are kept
+            image_hash = get_file_hash(os.path.join(self.source.output_folder, record.image_name))
+            if image_hash:
+                download = Future()
+                download.set_result((image_hash, None))
+        if download is None:
+            download = self.downloader.submit(record.image, record.image_name)
+            self.recent_images[record.image_name] = download
+            if len(self.recent_images) > RECENT_IMAGES:
+                self.recent_images.popitem(last=False)
+        record.download = download
@@ -1,41 +1,95 @@
-from libraries.common import log_message, browser
-from config import OUTPUT_FOLDER, tabs_dict
-from libraries.nytimes.nytimes import Nytimes
+from libraries.common import log_message, get_browser, is_browser_created
+from libraries.log_writer import log_writer
+from config import OUTPUT_FOLDER, search_backend, nytimes_search_url, date_shard_days, date_shard_workers, checkpoint
+from libraries.tracing import tracer
+
+NYTIMES_URL = "https://www.nytimes.com/"
 
 class Process():
     
-    def __init__(self, credentials: dict):
+    def __init__(self, credentials: dict, query: dict = None, output_folder: str = OUTPUT_FOLDER, headless: bool = False,
+                 resume: bool = False, checkpoint: bool = checkpoint, browser = None):
+        #The output folder is ready once a Process is created, also in the worker processes
+        log_writer.enable_file()
         log_message("Initialization")
+        self.credentials = credentials
+        self.query = query
+        self.output_folder = output_folder
+        self.headless = headless
+        self.resume = resume
+        self.checkpoint = checkpoint
+        #A warm browser of the service pool, already open on the NY Times, which the Process doesn't close
+        self.browser = browser
+        #The source, and the browser it may need, are only created when the process starts
+        self.nytimes = None
+
+    def open(self):
+        """
+        Creates the news source, launching the browser if the backend needs it, and accesses the NY Times
+        """
+        if self.nytimes is not None:
+            return
+        credentials, query, output_folder, headless = self.credentials, self.query, self.output_folder, self.headless
+
+        if search_backend == "http":
+            #The HTTP source doesn't need a browser at all
+            from libraries.nytimes.nytimes_http import NytimesHttp
+            nytimes = NytimesHttp({"url": credentials.get("url", NYTIMES_URL), "search_url": nytimes_search_url}, query, output_folder)
+        else:
+            from libraries.nytimes.nytimes import Nytimes
+            browser = self.browser
+            if browser is None:
+                from libraries.browser_profile import open_browser
+                browser = get_browser()
+                open_browser(browser, output_folder, headless)
+
+            nytimes = Nytimes(browser, {"url": credentials.get("url", NYTIMES_URL)}, query, output_folder)
 
-        prefs = {
-            "profile.default_content_setting_values.notifications": 2,
-            "profile.default_content_setting_popups": 0,
-            "directory_upgrade": True,
-            "download.default_directory": OUTPUT_FOLDER,
-            "plugins.always_open_pdf_externally": True,
-            "download.prompt_for_download": False
-        }
-
-        browser.open_available_browser(preferences = prefs)
-        browser.set_window_size(1920, 1080)
-        browser.maximize_browser_window()
-
-        nytimes = Nytimes(browser, {"url": "https://www.nytimes.com/"})
-        tabs_dict["NY Times"] = len(tabs_dict)
-        nytimes.access_nytimes()
         self.nytimes = nytimes
+        if self.checkpoint:
+            nytimes.enable_checkpoint(self.resume)
+        if nytimes.search_done:
+            #The run is resumed after the search had finished, so there is nothing left to do in the browser
+            return
+        if self.browser is not None and search_backend != "http":
+            #The warm browsers are already on the NY Times homepage
+            return
+        with tracer.span("access_nytimes"):
+            nytimes.access_nytimes()
 
     def start(self):
         """
         main
         """
-        self.nytimes.initial_search()
-        self.nytimes.filter_page()
-        self.nytimes.find_dates()
-        self.nytimes.get_articles_information()
-        self.nytimes.create_excel()
+        self.open()
+        if self.nytimes.search_done:
+            log_message("Skipped the search, the articles come from the checkpoint")
+        elif date_shard_days:
+            from libraries.sharding import find_dates_in_shards
+            with tracer.span("find_dates_in_shards"):
+                find_dates_in_shards(self.nytimes, date_shard_days, date_shard_workers)
+        else:
+            #The articles are analyzed, downloaded and written while the search keeps finding more
+            self.nytimes.start_pipeline()
+            with tracer.span("initial_search"):
+                self.nytimes.initial_search()
+            with tracer.span("filter_page"):
+                self.nytimes.filter_page()
+            with tracer.span("find_dates"):
+                self.nytimes.find_dates()
+        with tracer.span("get_articles_information"):
+            self.nytimes.get_articles_information()
+        with tracer.span("create_excel"):
+            self.nytimes.create_excel()
 
     
     def finish(self):
         log_message("DW Process Finished")
-        browser.close_browser()
\ No newline at end of file
+        if self.nytimes is not None:
+            self.nytimes.close()
+        if self.browser is None and is_browser_created():
+            get_browser().close_browser()
+
+        summary = tracer.save(self.output_folder)
+        if summary:
+            log_message("Time spent per stage and call:\n{}".format(summary))
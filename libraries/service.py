@@ -0,0 +1,346 @@
+"""
+Long-running service that keeps warm browsers open on the NY Times and runs search jobs sent over a local HTTP API
+
+POST /jobs                {"search_phrase": "Queen", "news_section": "New York", "month_number": "1"}
+GET  /jobs                every job
+GET  /jobs/<id>           status of a job
+GET  /jobs/<id>/results   results file of a finished job
+GET  /health              browsers, queued jobs and cached results
+"""
+import json, os, shutil, threading, time, uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Queue
+from libraries.common import log_message, create_browser, create_or_clean_dir
+from libraries.log_writer import log_writer
+from libraries.process import NYTIMES_URL
+from config import (OUTPUT_FOLDER, search_backend, news_section, month_number, service_browsers, service_host, service_port,
+                    service_cache_ttl, service_job_history, keyword_case_sensitive)
+
+def get_query_key(query: dict):
+    """
+    Function that returns the key of a query, the same for queries that only differ in spaces
+    The case of the search phrase is only ignored when the keywords are counted ignoring case, the keywords are kept as given
+    """
+    search_phrase = query["search_phrase"].strip()
+    if not keyword_case_sensitive:
+        search_phrase = search_phrase.lower()
+    keywords = json.dumps(query.get("search_keywords") or [], ensure_ascii=False)
+    return "{}|{}|{}|{}".format(search_phrase, query["news_section"].strip().lower(), query["month_number"], keywords)
+
+class BrowserPool():
+    """
+    Keeps browsers open on the NY Times homepage, so a job starts searching right away
+    With the HTTP backend there are no browsers, and the pool only limits the jobs running at once
+    """
+
+    def __init__(self, size: int, output_folder: str = OUTPUT_FOLDER):
+        self.size = max(1, size)
+        self.output_folder = output_folder
+        self.uses_browser = search_backend != "http"
+        self.idle = Queue()
+        self.browsers = []
+        self.lock = threading.Lock()
+
+    def start(self):
+        for _ in range(self.size):
+            self.idle.put(self._open() if self.uses_browser else None)
+        log_message("Opened {} warm browsers".format(self.size if self.uses_browser else 0))
+
+    def _open(self):
+        from libraries.browser_profile import open_browser
+        browser = create_browser()
+        open_browser(browser, self.output_folder, headless = True)
+        browser.go_to(NYTIMES_URL)
+        with self.lock:
+            self.browsers.append(browser)
+        return browser
+
+    def acquire(self):
+        """
+        Returns an idle browser, waiting for one if they are all busy
+        A browser that was discarded is opened again here, and if that fails its place stays in the pool
+        """
+        browser = self.idle.get()
+        if browser is None and self.uses_browser:
+            try:
+                browser = self._open()
+            except Exception:
+                self.idle.put(None)
+                raise
+        return browser
+
+    def release(self, browser):
+        """
+        Takes the browser back to the homepage for the next job
+        If it no longer responds it is closed, and the next job that takes its place opens a new one
+        """
+        if browser is not None:
+            try:
+                browser.go_to(NYTIMES_URL)
+            except Exception as e:
+                log_message("Discarding a browser that stopped responding: {}".format(str(e)))
+                self._discard(browser)
+                browser = None
+        self.idle.put(browser)
+
+    def _discard(self, browser):
+        with self.lock:
+            if browser in self.browsers:
+                self.browsers.remove(browser)
+        try:
+            browser.close_browser()
+        except Exception:
+            pass
+
+    def close(self):
+        with self.lock:
+            browsers, self.browsers = self.browsers, []
+        for browser in browsers:
+            try:
+                browser.close_browser()
+            except Exception:
+                pass
+
+class ResultCache():
+    """
+    Remembers the finished jobs of each query for a number of seconds, and deletes their output folder once they expire
+    """
+
+    def __init__(self, ttl: float = service_cache_ttl):
+        self.ttl = ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        self.evict()
+        with self.lock:
+            entry = self.entries.get(key)
+        return entry[1] if entry else None
+
+    def put(self, key: str, job: dict):
+        if self.ttl <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (time.time() + self.ttl, job)
+
+    def evict(self):
+        now = time.time()
+        with self.lock:
+            expired = [key for key, (expires, _) in self.entries.items() if expires <= now]
+            jobs = [self.entries.pop(key)[1] for key in expired]
+        for job in jobs:
+            job["status"] = "expired"
+            shutil.rmtree(job["folder"], ignore_errors = True)
+
+    def discard(self, job: dict):
+        with self.lock:
+            for key in [key for key, (_, cached) in self.entries.items() if cached is job]:
+                del self.entries[key]
+
+    def __len__(self):
+        return len(self.entries)
+
+class JobService():
+    """
+    Queues the search jobs and runs them on the warm browsers, one job per browser at a time
+    A query that was finished recently, or is already queued or running, is answered with that same job
+    """
+
+    def __init__(self, workers: int = service_browsers, output_folder: str = OUTPUT_FOLDER, history: int = service_job_history):
+        self.output_folder = os.path.join(output_folder, "jobs")
+        self.pool = BrowserPool(workers, output_folder)
+        self.cache = ResultCache()
+        self.queue = Queue()
+        self.history = max(1, history)
+        self.jobs = {}
+        self.active = {}
+        self.lock = threading.Lock()
+        self.threads = [threading.Thread(target=self._work, daemon=True) for _ in range(self.pool.size)]
+
+    def start(self):
+        os.makedirs(self.output_folder, exist_ok = True)
+        self.pool.start()
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, query: dict):
+        """
+        Queues a search and returns its job, or the job of an identical query that can be reused
+        """
+        if not isinstance(query, dict):
+            raise ValueError("The job must be a JSON object")
+        if not query.get("search_phrase") or not isinstance(query["search_phrase"], str):
+            raise ValueError("The job needs a 'search_phrase'")
+        if not isinstance(query.get("news_section", news_section), str):
+            raise ValueError("The 'news_section' must be a string")
+        keywords = query.get("search_keywords")
+        if keywords is not None and (not isinstance(keywords, list) or not all(isinstance(keyword, str) for keyword in keywords)):
+            raise ValueError("The 'search_keywords' must be a list of strings")
+        query = {"search_phrase": query["search_phrase"], "news_section": query.get("news_section", news_section),
+                 "month_number": str(query.get("month_number", month_number)), "search_keywords": query.get("search_keywords")}
+        key = get_query_key(query)
+
+        self._prune()
+        cached = self.cache.get(key)
+        if cached is not None:
+            return dict(cached, cached = True)
+        with self.lock:
+            if key in self.active:
+                return self.active[key]
+            job_id = uuid.uuid4().hex[:12]
+            job = {"id": job_id, "query": query, "status": "queued", "cached": False, "submitted": time.time(),
+                   "started": None, "finished": None, "results_count": 0, "results_path": "", "error": "",
+                   "folder": os.path.join(self.output_folder, job_id)}
+            self.jobs[job_id] = job
+            self.active[key] = job
+        self.queue.put((key, job))
+        return job
+
+    def get(self, job_id: str):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _work(self):
+        #Nothing raised by a job leaves this loop, so the worker never dies and its browser is never lost
+        while True:
+            key, job = self.queue.get()
+            browser = None
+            acquired = False
+            try:
+                browser = self.pool.acquire()
+                acquired = True
+                self._run_job(job, browser)
+            except Exception as e:
+                log_message("The job {} failed: {}".format(job["id"], str(e)), "ERROR")
+                job["error"] = str(e)
+                job["status"] = "failed"
+            finally:
+                #The job is settled before the browser goes back, so an identical query never waits on it
+                job["finished"] = time.time()
+                with self.lock:
+                    self.active.pop(key, None)
+                if job["status"] == "done":
+                    self.cache.put(key, job)
+                if acquired:
+                    try:
+                        self.pool.release(browser)
+                    except Exception as e:
+                        log_message("Couldn't bring a browser back to the pool: {}".format(str(e)), "ERROR")
+                try:
+                    self._prune()
+                except Exception as e:
+                    log_message("Couldn't prune the finished jobs: {}".format(str(e)), "ERROR")
+
+    def _run_job(self, job: dict, browser):
+        from libraries.process import Process
+        job["status"] = "running"
+        job["started"] = time.time()
+        create_or_clean_dir(job["folder"])
+        process = Process({}, job["query"], job["folder"], headless = True, checkpoint = False, browser = browser)
+        try:
+            process.start()
+            job["results_count"] = process.nytimes.results_count
+            job["results_path"] = process.nytimes.results_path
+            job["status"] = "done"
+        finally:
+            try:
+                process.finish()
+            except Exception as e:
+                log_message("Couldn't finish the job {}: {}".format(job["id"], str(e)), "ERROR")
+
+    def _prune(self):
+        """
+        Forgets the jobs whose cached results expired, and the oldest finished jobs past the history limit
+        """
+        self.cache.evict()
+        with self.lock:
+            for job_id in [job_id for job_id, job in self.jobs.items() if job["status"] == "expired"]:
+                del self.jobs[job_id]
+            finished = sorted((job for job in self.jobs.values() if job["finished"] is not None), key=lambda job: job["finished"])
+            dropped = finished[:max(0, len(self.jobs) - self.history)]
+            for job in dropped:
+                del self.jobs[job["id"]]
+        for job in dropped:
+            self.cache.discard(job)
+            shutil.rmtree(job["folder"], ignore_errors = True)
+
+    def get_health(self):
+        return {"browsers": len(self.pool.browsers), "idle": self.pool.idle.qsize(), "queued": self.queue.qsize(),
+                "cached": len(self.cache), "jobs": len(self.jobs)}
+
+    def close(self):
+        self.pool.close()
+
+class ServiceHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, body, status: int = 200):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self.send_json({"error": "Not found"}, 404)
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            job = self.server.service.submit(json.loads(self.rfile.read(length) or b"{}"))
+        except ValueError as e:
+            return self.send_json({"error": str(e)}, 400)
+        self.send_json(job, 200 if job["status"] == "done" else 202)
+
+    def do_GET(self):
+        service = self.server.service
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        if parts == ["health"]:
+            return self.send_json(service.get_health())
+        if parts == ["jobs"]:
+            #The jobs are copied under the lock and sent after, so a slow client never holds it
+            with service.lock:
+                jobs = [dict(job) for job in service.jobs.values()]
+            return self.send_json(jobs)
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            job = service.get(parts[1])
+            if job is None:
+                return self.send_json({"error": "Job not found"}, 404)
+            if len(parts) == 2:
+                return self.send_json(job)
+            if parts[2] == "results":
+                return self.send_results(job)
+        self.send_json({"error": "Not found"}, 404)
+
+    def send_results(self, job: dict):
+        if job["status"] != "done" or not os.path.exists(job["results_path"]):
+            return self.send_json({"error": "The job has no results, its status is {}".format(job["status"])}, 409)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Disposition", 'attachment; filename="{}"'.format(os.path.basename(job["results_path"])))
+        self.send_header("Content-Length", str(os.path.getsize(job["results_path"])))
+        self.end_headers()
+        with open(job["results_path"], "rb") as file:
+            shutil.copyfileobj(file, self.wfile)
+
+def serve(host: str = service_host, port: int = service_port):
+    """
+    Function that runs the service until it is interrupted
+    """
+    #The service keeps the output folder, so the log file can be written right away
+    log_writer.enable_file()
+    service = JobService()
+    service.start()
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.daemon_threads = True
+    server.service = service
+    log_message("Serving search jobs at http://{}:{}/".format(host, server.server_address[1]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
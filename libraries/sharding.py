@@ -0,0 +1,85 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from libraries.common import log_message
+from libraries.log_writer import log_writer
+from libraries.article_index import ArticleIndex
+from config import max_results
+
+def split_date_range(start_date: datetime, end_date: datetime, shard_days: int):
+    """
+    Function that splits a date range in consecutive ranges of shard_days days, newest first
+    Each range is searched as (start, end], so two consecutive ranges share their boundary day
+    and the articles of that day are found by the older one
+    """
+    shards = []
+    shard_end = end_date
+    while shard_end > start_date:
+        shard_start = max(start_date, shard_end - timedelta(days=shard_days))
+        shards.append((shard_start, shard_end))
+        shard_end = shard_start
+    return shards
+
+def scrape_shard(query: dict, start_date: datetime, end_date: datetime, output_folder: str):
+    """
+    Function that finds the articles of one date range in its own headless browser
+    It runs inside a worker process, and returns the plain article records
+    """
+    #Imported here since the Process itself uses this module
+    from libraries.process import Process
+    #The checkpoint of the output folder belongs to the main process
+    process = Process({}, query, output_folder, headless = True, checkpoint = False)
+    try:
+        process.open()
+        process.nytimes.initial_search()
+        process.nytimes.filter_page()
+        process.nytimes.find_dates(start_date, end_date)
+        return process.nytimes.articles_container
+    finally:
+        process.finish()
+        log_writer.close()
+
+def merge_shards(shard_articles: list):
+    """
+    Function that merges the articles of every range, given newest first, without duplicates
+    """
+    merged = []
+    seen = set()
+    for articles in shard_articles:
+        for article in articles:
+            key = ArticleIndex.article_key(article)
+            if key not in seen:
+                seen.add(key)
+                merged.append(article)
+    return merged[:max_results] if max_results else merged
+
+def find_dates_in_shards(nytimes, shard_days: int, workers: int):
+    """
+    Function that finds the articles of the search splitting its date range in shards scraped in parallel
+    The newest shard uses the browser of the Process, the rest run in a pool of worker processes
+    """
+    log_message("Start - Find the Articles in date shards")
+    shards = split_date_range(nytimes.get_search_date(), datetime.now(), shard_days)
+    query = {"search_phrase": nytimes.search_phrase, "news_section": nytimes.news_section,
+             "month_number": nytimes.month_number, "search_keywords": nytimes.search_keywords}
+    log_message("Split the search in {} date ranges of {} days".format(len(shards), shard_days))
+
+    shard_articles = []
+    executor = ProcessPoolExecutor(max_workers=max(1, min(workers, len(shards) - 1))) if len(shards) > 1 else None
+    try:
+        futures = []
+        if executor is not None:
+            futures = [executor.submit(scrape_shard, query, start, end, nytimes.output_folder) for start, end in shards[1:]]
+
+        nytimes.initial_search()
+        nytimes.filter_page()
+        nytimes.find_dates(*shards[0])
+        shard_articles.append(list(nytimes.articles_container))
+        for future in futures:
+            shard_articles.append(future.result())
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    nytimes.articles_container = merge_shards(shard_articles)
+    nytimes.articles_found = len(nytimes.articles_container)
+    log_message("End - Find the Articles in date shards, found {}".format(nytimes.articles_found))
@@ -0,0 +1,164 @@
+import csv, json, os
+
+class ResultSink():
+    """
+    Base class of the outputs the results are written to, one row at a time as they are produced
+    """
+    extension = ""
+
+    def __init__(self, folder_path: str, columns: list, name: str = "News"):
+        self.path = os.path.join(folder_path, "{}.{}".format(name, self.extension))
+        self.columns = list(columns)
+        self.rows_written = 0
+
+    def write(self, row: dict):
+        self._write(row)
+        self.rows_written += 1
+
+    def _write(self, row: dict):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class XlsxSink(ResultSink):
+    """
+    Streams the rows into a write-only workbook, which keeps them in a temporary file instead of in memory
+    The workbook is only readable once it has been closed
+    """
+    extension = "xlsx"
+
+    def __init__(self, folder_path: str, columns: list, name: str = "News"):
+        super().__init__(folder_path, columns, name)
+        from openpyxl import Workbook
+        self.workbook = Workbook(write_only=True)
+        self.worksheet = self.workbook.create_sheet("Results")
+        self.worksheet.append(self.columns)
+
+    def _write(self, row: dict):
+        self.worksheet.append([row.get(column) for column in self.columns])
+
+    def close(self):
+        if self.workbook is not None:
+            self.workbook.save(self.path)
+            self.workbook = None
+
+class CsvSink(ResultSink):
+    """
+    Writes the rows to a CSV file, flushing each one so a partial output is usable
+    """
+    extension = "csv"
+
+    def __init__(self, folder_path: str, columns: list, name: str = "News"):
+        super().__init__(folder_path, columns, name)
+        self.file = open(self.path, "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=self.columns, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def _write(self, row: dict):
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class JsonLinesSink(ResultSink):
+    """
+    Writes each row as a JSON object in its own line, flushing each one so a partial output is usable
+    """
+    extension = "jsonl"
+
+    def __init__(self, folder_path: str, columns: list, name: str = "News"):
+        super().__init__(folder_path, columns, name)
+        self.file = open(self.path, "w", encoding="utf-8")
+
+    def _write(self, row: dict):
+        self.file.write(json.dumps({column: row.get(column) for column in self.columns}, ensure_ascii=False))
+        self.file.write("\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class ParquetSink(ResultSink):
+    """
+    Writes the rows to a Parquet file in row groups, it needs pyarrow installed
+    """
+    extension = "parquet"
+
+    def __init__(self, folder_path: str, columns: list, name: str = "News", row_group_size: int = 1000):
+        super().__init__(folder_path, columns, name)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("The parquet output format needs pyarrow, install it with 'pip install pyarrow'")
+        self.pyarrow = pyarrow
+        self.writer = None
+        self.row_group_size = row_group_size
+        self.buffer = []
+
+    def _write(self, row: dict):
+        self.buffer.append(row)
+        if len(self.buffer) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        table = self.pyarrow.Table.from_pylist([{column: row.get(column) for column in self.columns} for row in self.buffer])
+        if self.writer is None:
+            self.writer = self.pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+        self.buffer = []
+
+    def close(self):
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+sinks_dict = {"xlsx": XlsxSink, "csv": CsvSink, "jsonl": JsonLinesSink, "parquet": ParquetSink}
+
+def create_sink(output_format: str, folder_path: str, columns: list, name: str = "News"):
+    """
+    Function that returns the sink for a given output format
+    """
+    if output_format.lower() not in sinks_dict:
+        raise ValueError("Unknown output format '{}', use one of {}".format(output_format, ", ".join(sinks_dict)))
+    return sinks_dict[output_format.lower()](folder_path, columns, name)
+
+def read_results(path: str):
+    """
+    Function that yields, as dictionaries, the rows of a results file written by any of the sinks
+    """
+    extension = path.rsplit(".", 1)[-1].lower()
+    if extension == "xlsx":
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        try:
+            rows = workbook["Results"].iter_rows(values_only=True)
+            columns = next(rows, None) or []
+            for values in rows:
+                yield dict(zip(columns, values))
+        finally:
+            workbook.close()
+    elif extension == "csv":
+        with open(path, newline="", encoding="utf-8") as file:
+            yield from csv.DictReader(file)
+    elif extension == "jsonl":
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+    elif extension == "parquet":
+        import pyarrow.parquet
+        yield from pyarrow.parquet.read_table(path).to_pylist()
+    else:
+        raise ValueError("Unknown results file '{}'".format(path))
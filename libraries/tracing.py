@@ -0,0 +1,136 @@
+import json, os, threading, time
+from contextlib import contextmanager, nullcontext
+from config import tracing
+
+class Tracer():
+    """
+    Records how long each stage and WebDriver call takes, and saves it as a Chrome trace-event file
+    When it is disabled, spans are a shared no-op context and nothing is recorded
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.events = []
+        self.stats = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+
+    def span(self, name: str, category: str = "stage", **args):
+        """
+        Returns a context manager that records the time spent inside it
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self._span(name, category, args)
+
+    @contextmanager
+    def _span(self, name: str, category: str, args: dict):
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.record(name, category, start, time.perf_counter(), failed, args)
+
+    def record(self, name: str, category: str, start: float, end: float, failed: bool = False, args: dict = None):
+        """
+        Records a finished span, given its start and end from time.perf_counter
+        """
+        if not self.enabled:
+            return
+        event = {"name": name, "cat": category, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                 "ts": round((start - self.origin) * 1e6, 1), "dur": round((end - start) * 1e6, 1)}
+        if args:
+            event["args"] = args
+        if failed:
+            event.setdefault("args", {})["failed"] = True
+        with self.lock:
+            self.events.append(event)
+            stat = self.stats.setdefault((category, name), {"calls": 0, "total": 0.0, "max": 0.0, "errors": 0})
+            stat["calls"] += 1
+            stat["total"] += end - start
+            stat["max"] = max(stat["max"], end - start)
+            stat["errors"] += failed
+
+    def count(self, name: str, value: int = 1):
+        """
+        Adds to a counter, like the retries or the bytes downloaded
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def take(self):
+        """
+        Returns the events, stats and counters recorded so far and starts over,
+        so a worker process or the service that runs several queries saves each one with only its own spans
+        """
+        with self.lock:
+            taken = self.events, self.stats, self.counters
+            self.events = []
+            self.stats = {}
+            self.counters = {}
+        return taken
+
+    def get_summary(self, stats: dict = None, counters: dict = None):
+        """
+        Returns a table with the calls, durations and errors of every span, slowest first, and the counters
+        """
+        stats = self.stats if stats is None else stats
+        counters = self.counters if counters is None else counters
+        lines = ["{:<10} {:<40} {:>7} {:>10} {:>10} {:>10} {:>7}".format(
+            "Category", "Name", "Calls", "Total s", "Mean ms", "Max ms", "Errors")]
+        for (category, name), stat in sorted(stats.items(), key=lambda item: -item[1]["total"]):
+            lines.append("{:<10} {:<40} {:>7} {:>10.3f} {:>10.1f} {:>10.1f} {:>7}".format(
+                category, name[:40], stat["calls"], stat["total"], stat["total"] * 1000 / stat["calls"],
+                stat["max"] * 1000, stat["errors"]))
+        for name, value in sorted(counters.items()):
+            lines.append("{:<51} {:>7}".format(name, value))
+        return "\n".join(lines)
+
+    def save(self, folder_path: str):
+        """
+        Writes the trace, which opens in chrome://tracing or Perfetto, and the summary table to the folder,
+        and starts over for the next query
+        Returns the summary table, or an empty string when the tracer is disabled
+        """
+        if not self.enabled:
+            return ""
+        from multiprocessing import current_process
+        #Worker processes may share the output folder, so their files carry their pid
+        suffix = "" if current_process().name == "MainProcess" else "_{}".format(os.getpid())
+        events, stats, counters = self.take()
+        trace = {"traceEvents": events, "displayTimeUnit": "ms", "otherData": counters}
+        with open(os.path.join(folder_path, "trace{}.json".format(suffix)), "w", encoding="utf-8") as file:
+            json.dump(trace, file)
+        summary = self.get_summary(stats, counters)
+        with open(os.path.join(folder_path, "trace_summary{}.txt".format(suffix)), "w", encoding="utf-8") as file:
+            file.write(summary + "\n")
+        return summary
+
+class InstrumentedBrowser():
+    """
+    Wraps the RPA Selenium library, so every call made through it is recorded by the tracer
+    """
+
+    def __init__(self, browser, tracer: Tracer):
+        self._browser = browser
+        self._tracer = tracer
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._browser, name)
+        if not callable(attribute) or name.startswith("_"):
+            return attribute
+
+        tracer = self._tracer
+        def traced(*args, **kwargs):
+            with tracer.span(name, "webdriver"):
+                return attribute(*args, **kwargs)
+        return traced
+
+tracer = Tracer(tracing)
@@ -0,0 +1,84 @@
+import os
+from importlib.util import find_spec
+from urllib.parse import urlparse
+from config import (OUTPUT_FOLDER, month_number, search_backend, output_format, incremental, article_index_path,
+                    search_queries, date_shard_days, date_shard_workers, batch_workers, browser_profile,
+                    nytimes_search_url, nytimes_api_key)
+
+#Host of the NY Times Article Search API, which answers 401 without an API key
+NYTIMES_API_HOST = "api.nytimes.com"
+
+#Modules each search backend needs, checked without importing them
+BACKEND_MODULES = {"browser": ["RPA.Browser.Selenium", "selenium"], "http": ["requests", "lxml"]}
+
+def is_module_available(name: str):
+    """
+    Function that returns whether a module can be imported, without importing it
+    """
+    try:
+        return find_spec(name) is not None
+    except ModuleNotFoundError:
+        return False
+
+def is_folder_writable(folder_path: str):
+    """
+    Function that returns whether a folder can be written to, or created if it doesn't exist yet
+    """
+    folder_path = os.path.abspath(folder_path)
+    while not os.path.exists(folder_path):
+        parent = os.path.dirname(folder_path)
+        if parent == folder_path:
+            return False
+        folder_path = parent
+    return os.path.isdir(folder_path) and os.access(folder_path, os.W_OK)
+
+def validate_config(output_folder: str = OUTPUT_FOLDER):
+    """
+    Function that checks the configuration and the output paths without starting a browser
+    Returns the list of problems found, empty when everything is fine
+    """
+    from libraries.sinks import sinks_dict
+    problems = []
+
+    if not month_number.isdigit():
+        problems.append("'Number of Months' must be a whole number, got '{}'".format(month_number))
+    if search_backend not in BACKEND_MODULES:
+        problems.append("'Search Backend' must be one of {}, got '{}'".format(", ".join(BACKEND_MODULES), search_backend))
+    else:
+        for module in BACKEND_MODULES[search_backend]:
+            if not is_module_available(module):
+                problems.append("The {} backend needs the '{}' module, which isn't installed".format(search_backend, module))
+        if search_backend == "http" and urlparse(nytimes_search_url).hostname == NYTIMES_API_HOST and not nytimes_api_key:
+            problems.append("The http backend searches {}, which needs an 'NYT API Key'".format(nytimes_search_url))
+
+    if browser_profile not in ("full", "lean"):
+        problems.append("'Browser Profile' must be full or lean, got '{}'".format(browser_profile))
+
+    if output_format.lower() not in sinks_dict:
+        problems.append("'Output Format' must be one of {}, got '{}'".format(", ".join(sinks_dict), output_format))
+    elif output_format.lower() == "xlsx" and not is_module_available("openpyxl"):
+        problems.append("The xlsx output format needs the 'openpyxl' module, which isn't installed")
+    elif output_format.lower() == "parquet" and not is_module_available("pyarrow"):
+        problems.append("The parquet output format needs the 'pyarrow' module, which isn't installed")
+
+    if not is_folder_writable(output_folder):
+        problems.append("The output folder {} can't be written to".format(output_folder))
+    if incremental and not is_folder_writable(os.path.dirname(os.path.abspath(article_index_path))):
+        problems.append("The article index {} can't be written to".format(article_index_path))
+
+    if date_shard_days < 0:
+        problems.append("'Date Shard Days' can't be negative, got {}".format(date_shard_days))
+    if date_shard_workers < 1 or batch_workers < 1:
+        problems.append("'Date Shard Workers' and 'Batch Workers' must be at least 1")
+
+    if search_queries:
+        from libraries.batch import load_queries
+        try:
+            queries = load_queries(search_queries)
+            for query in queries:
+                if not query["month_number"].isdigit():
+                    problems.append("The query '{}' needs a whole number of months".format(query["search_phrase"]))
+        except Exception as e:
+            problems.append("'Search Queries' couldn't be loaded: {}".format(str(e)))
+
+    return problems
@@ -0,0 +1,192 @@
+import time
+from selenium.common.exceptions import (NoSuchElementException, StaleElementReferenceException, ElementNotVisibleException,
+                                        ElementNotInteractableException, ElementClickInterceptedException, TimeoutException)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions
+from libraries.tracing import tracer
+from config import wait_timeout, wait_initial_poll, wait_max_poll
+
+IGNORED_EXCEPTIONS = (NoSuchElementException, StaleElementReferenceException, ElementNotVisibleException,
+                      ElementNotInteractableException, ElementClickInterceptedException)
+
+#Resolves as soon as there are more than the given number of elements, or after the timeout,
+#so the browser wakes the robot up on each DOM mutation instead of being polled
+WAIT_FOR_COUNT_JS = """
+var xpath = arguments[0], count = arguments[1], timeout = arguments[2], done = arguments[arguments.length - 1];
+var current = function () {
+    return document.evaluate("count(" + xpath + ")", document, null, XPathResult.NUMBER_TYPE, null).numberValue;
+};
+if (current() > count) { done(current()); return; }
+var timer = null;
+var observer = new MutationObserver(function () {
+    var found = current();
+    if (found > count) {
+        observer.disconnect();
+        clearTimeout(timer);
+        done(found);
+    }
+});
+observer.observe(document.body, {childList: true, subtree: true});
+timer = setTimeout(function () { observer.disconnect(); done(current()); }, timeout * 1000);
+"""
+
+def get_xpath_locator(path: str):
+    """
+    Function that returns the Selenium locator of an xpath, with or without the "xpath:" prefix
+    """
+    if path.startswith("xpath:"):
+        path = path[len("xpath:"):]
+    return (By.XPATH, path)
+
+class WaitEngine():
+    """
+    Waits for elements with WebDriver explicit conditions, polling with an exponential backoff
+    that starts in milliseconds, and keeps statistics of the time waited per locator
+    """
+
+    def __init__(self, rpa_selenium_instance, timeout: float = wait_timeout, timeouts: dict = None,
+                 initial_poll: float = wait_initial_poll, max_poll: float = wait_max_poll):
+        self.browser = rpa_selenium_instance
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self.initial_poll = initial_poll
+        self.max_poll = max_poll
+        self.stats = {}
+
+    def until(self, condition, locator, timeout: float = None):
+        """
+        Waits until the condition returns something truthy, and returns it
+        Raises a TimeoutException if it doesn't happen in the timeout of the locator
+        """
+        if timeout is None:
+            timeout = self.timeouts.get(locator, self.timeout)
+        key = locator if isinstance(locator, str) else "<element>"
+        driver = self.browser.driver
+
+        start = time.perf_counter()
+        deadline = start + timeout
+        poll = self.initial_poll
+        result = False
+        retries = 0
+        try:
+            while True:
+                try:
+                    result = condition(driver)
+                except IGNORED_EXCEPTIONS:
+                    result = False
+                if result:
+                    return result
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    raise TimeoutException("Element {} not found after {}s".format(key, timeout))
+                time.sleep(min(poll, remaining))
+                poll = min(poll * 2, self.max_poll)
+                retries += 1
+        finally:
+            end = time.perf_counter()
+            self.record(key, end - start, not result, retries)
+            if tracer.enabled:
+                tracer.record(key, "wait", start, end, not result)
+                tracer.count("wait retries", retries)
+
+    def record(self, key: str, waited: float, timed_out: bool, retries: int = 0):
+        stat = self.stats.setdefault(key, {"waits": 0, "total": 0.0, "max": 0.0, "timeouts": 0, "retries": 0})
+        stat["waits"] += 1
+        stat["total"] += waited
+        stat["max"] = max(stat["max"], waited)
+        stat["timeouts"] += timed_out
+        stat["retries"] += retries
+
+    def exists(self, locator: str):
+        """
+        Returns whether the element is in the DOM right now, without waiting for it
+        """
+        return bool(self.browser.driver.find_elements(*get_xpath_locator(locator)))
+
+    def present(self, locator: str, timeout: float = None):
+        """
+        Waits until the element is in the DOM and returns it
+        """
+        return self.until(expected_conditions.presence_of_element_located(get_xpath_locator(locator)), locator, timeout)
+
+    def all_present(self, locator: str, timeout: float = None):
+        """
+        Waits until at least one element is in the DOM and returns all of them
+        """
+        return self.until(expected_conditions.presence_of_all_elements_located(get_xpath_locator(locator)), locator, timeout)
+
+    def visible(self, locator: str, timeout: float = None):
+        """
+        Waits until the element is visible and returns it
+        """
+        return self.until(expected_conditions.visibility_of_element_located(get_xpath_locator(locator)), locator, timeout)
+
+    def clickable(self, locator, timeout: float = None):
+        """
+        Waits until the element, given as a locator or a WebElement, is visible and enabled, and returns it
+        """
+        if isinstance(locator, str):
+            condition = expected_conditions.element_to_be_clickable(get_xpath_locator(locator))
+        else:
+            condition = lambda driver: locator if locator.is_displayed() and locator.is_enabled() else False
+        return self.until(condition, locator, timeout)
+
+    def click(self, locator, timeout: float = None):
+        """
+        Waits until the element is clickable and clicks it, retrying while something else covers it
+        """
+        if isinstance(locator, str):
+            clickable = expected_conditions.element_to_be_clickable(get_xpath_locator(locator))
+        else:
+            clickable = lambda driver: locator if locator.is_displayed() and locator.is_enabled() else False
+
+        def condition(driver):
+            element = clickable(driver)
+            if not element:
+                return False
+            element.click()
+            return True
+        return self.until(condition, locator, timeout)
+
+    def input_text(self, locator: str, text: str, timeout: float = None):
+        """
+        Waits until the input is visible, clears it and types the text
+        """
+        element = self.visible(locator, timeout)
+        element.clear()
+        element.send_keys(text)
+        return element
+
+    def stale(self, element, timeout: float = None):
+        """
+        Waits until the element is no longer attached to the DOM, for example after a navigation
+        """
+        return self.until(expected_conditions.staleness_of(element), element, timeout)
+
+    def count_more_than(self, locator: str, count: int, timeout: float = None):
+        """
+        Waits, through a MutationObserver in the page, until there are more than count elements matching the locator
+        Returns the number of elements, which isn't more than count if it timed out
+        """
+        if timeout is None:
+            timeout = self.timeouts.get(locator, self.timeout)
+        driver = self.browser.driver
+        driver.set_script_timeout(timeout + 5)
+
+        start = time.perf_counter()
+        found = int(driver.execute_async_script(WAIT_FOR_COUNT_JS, get_xpath_locator(locator)[1], count, timeout))
+        end = time.perf_counter()
+        self.record(locator, end - start, found <= count)
+        if tracer.enabled:
+            tracer.record(locator, "wait", start, end, found <= count)
+        return found
+
+    def get_summary(self):
+        """
+        Returns a table with the waits, time waited and timeouts of every locator, longest first
+        """
+        lines = ["{:>7} {:>9} {:>9} {:>8} {:>8}  {}".format("Waits", "Total s", "Max s", "Retries", "Timeouts", "Locator")]
+        for key, stat in sorted(self.stats.items(), key=lambda item: -item[1]["total"]):
+            lines.append("{:>7} {:>9.3f} {:>9.3f} {:>8} {:>8}  {}".format(
+                stat["waits"], stat["total"], stat["max"], stat["retries"], stat["timeouts"], key))
+        return "\n".join(lines)
@@ -1,17 +1,50 @@
-from config import OUTPUT_FOLDER
+import os, sys
+from config import OUTPUT_FOLDER, incremental, search_queries
 from libraries.common import log_message, print_version, create_or_clean_dir, capture_page_screenshot
-from libraries.process import Process
+from libraries.log_writer import log_writer
 
-def main():
+def validate():
+    """
+    Dry run: checks the configuration and the output paths without starting a browser or touching the output folder
+    """
+    from libraries.validation import validate_config
+    problems = validate_config()
+    for problem in problems:
+        log_message(problem, "ERROR")
+    if problems:
+        raise SystemExit(1)
+    log_message("The configuration is valid")
+
+def main(resume: bool = False):
     """
     Main function that calls all other functions
+    When resuming, the output folder is kept and the run continues from its last checkpoint
     """
-    create_or_clean_dir(OUTPUT_FOLDER)
-    process = Process({})
+    #Imported here, so a dry run never loads the browser or the search sources
+    from libraries.process import Process
+    from libraries.batch import load_queries, run_batch
+
+    if incremental or resume:
+        #The images of previous runs are kept, so the article index or the checkpoint can reuse them
+        os.makedirs(OUTPUT_FOLDER, exist_ok = True)
+    else:
+        create_or_clean_dir(OUTPUT_FOLDER)
+    log_writer.enable_file()
+
+    if search_queries:
+        #Batch mode, every query runs in its own worker process and output subfolder
+        run_batch(load_queries(search_queries), resume = resume)
+        return
+
+    process = Process({}, resume = resume)
     try:
         process.start()
     except Exception as e:
-        capture_page_screenshot(OUTPUT_FOLDER)
+        try:
+            capture_page_screenshot(OUTPUT_FOLDER)
+        except Exception as screenshot_error:
+            #The HTTP search backend runs without a browser, so there may be nothing to capture
+            log_message("Couldn't capture a screenshot: {}".format(str(screenshot_error)))
         log_message("An unexpected error was encountered during the process: {}".format(str(e)))
         raise e
     finally:
@@ -21,5 +54,12 @@ if __name__ == "__main__":
     digital_worker_name = "Thoughtful Automation Challenge"
     log_message("Start - {}".format(digital_worker_name))
     print_version()
-    main()
+    if "--dry-run" in sys.argv[1:] or "--validate" in sys.argv[1:]:
+        validate()
+    elif "--serve" in sys.argv[1:]:
+        #Service mode, the browsers stay open and the searches come from the local API
+        from libraries.service import serve
+        serve()
+    else:
+        main(resume = "--resume" in sys.argv[1:])
     log_message("End - {}".format(digital_worker_name))